@@ -0,0 +1,47 @@
+"""add salary aggregates
+
+Revision ID: 5d2e8a1c7b90
+Revises: fa9430914c71
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8a1c7b90'
+down_revision: Union[str, Sequence[str], None] = 'fa9430914c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The table starts empty, fill it with `python -m app.commands.rebuild_salary_aggregates`.
+    """
+    op.create_table('salary_aggregates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('position_key', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('salary_sum', sa.Float(), nullable=False),
+    sa.Column('salary_sum_squares', sa.Float(), nullable=False),
+    sa.Column('min_amount', sa.Float(), nullable=True),
+    sa.Column('max_amount', sa.Float(), nullable=True),
+    sa.Column('sketch', sa.JSON(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'position_key', name='uq_salary_aggregates_company_position')
+    )
+    op.create_index(op.f('ix_salary_aggregates_id'), 'salary_aggregates', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_salary_aggregates_id'), table_name='salary_aggregates')
+    op.drop_table('salary_aggregates')
@@ -0,0 +1,99 @@
+"""add salary position normalized
+
+Revision ID: 8b31f0d4e6a2
+Revises: 5d2e8a1c7b90
+Create Date: 2026-10-18 11:04:19.902731
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b31f0d4e6a2'
+down_revision: Union[str, Sequence[str], None] = '5d2e8a1c7b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Frozen copy of app.utils.position.normalize_position as of this revision, so later
+# changes to the live normalizer cannot change what this migration writes
+_POSITION_SYNONYMS = {
+    "sr": "senior",
+    "snr": "senior",
+    "jr": "junior",
+    "jnr": "junior",
+    "mid": "middle",
+    "dev": "developer",
+    "eng": "engineer",
+    "engr": "engineer",
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "mgr": "manager",
+    "qa": "quality assurance",
+    "ml": "machine learning",
+    "ds": "data scientist",
+}
+_COMPOUNDS = [
+    (re.compile(r"\bfront[\s-]+end\b"), "frontend"),
+    (re.compile(r"\bback[\s-]+end\b"), "backend"),
+    (re.compile(r"\bfull[\s-]+stack\b"), "fullstack"),
+]
+_SEPARATORS = re.compile(r"[\s,/_\-()]+")
+
+
+def _normalize_position(position):
+    if not position:
+        return ""
+    text = position.strip().lower()
+    for pattern, replacement in _COMPOUNDS:
+        text = pattern.sub(replacement, text)
+    tokens = []
+    for token in _SEPARATORS.split(text):
+        token = token.rstrip(".")
+        if token:
+            tokens.append(_POSITION_SYNONYMS.get(token, token))
+    return " ".join(tokens)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('salaries', sa.Column('position_normalized', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    salaries = sa.table('salaries', sa.column('id', sa.Integer), sa.column('position', sa.String), sa.column('position_normalized', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(salaries.c.id, salaries.c.position)
+            .where(salaries.c.id > last_id)
+            .order_by(salaries.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            salaries.update().where(salaries.c.id == sa.bindparam('row_id')).values(position_normalized=sa.bindparam('normalized')),
+            [{'row_id': row.id, 'normalized': _normalize_position(row.position)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    op.alter_column('salaries', 'position_normalized', nullable=False)
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_salaries_position_normalized_trgm', 'salaries', ['position_normalized'], unique=False,
+        postgresql_using='gin', postgresql_ops={'position_normalized': 'gin_trgm_ops'}
+    )
+    # Rollup keys now collapse synonyms; rebuild with python -m app.commands.rebuild_salary_aggregates
+    op.execute('DELETE FROM salary_aggregates')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_salaries_position_normalized_trgm', table_name='salaries')
+    op.drop_column('salaries', 'position_normalized')
@@ -0,0 +1,33 @@
+"""moderation log manual decisions
+
+Revision ID: a3c58e71d209
+Revises: f6d20b8e4c15
+Create Date: 2026-10-18 15:12:08.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c58e71d209'
+down_revision: Union[str, Sequence[str], None] = 'f6d20b8e4c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('moderation_logs', 'ai_score', existing_type=sa.Float(), nullable=True)
+    op.add_column('moderation_logs', sa.Column('moderator_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(op.f('moderation_logs_moderator_id_fkey'), 'moderation_logs', 'users', ['moderator_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('moderation_logs_moderator_id_fkey'), 'moderation_logs', type_='foreignkey')
+    op.drop_column('moderation_logs', 'moderator_id')
+    op.execute("UPDATE moderation_logs SET ai_score = 0 WHERE ai_score IS NULL")
+    op.alter_column('moderation_logs', 'ai_score', existing_type=sa.Float(), nullable=False)
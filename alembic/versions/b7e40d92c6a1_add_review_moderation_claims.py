@@ -0,0 +1,37 @@
+"""add review moderation claims
+
+Revision ID: b7e40d92c6a1
+Revises: a3c58e71d209
+Create Date: 2026-10-18 15:41:26.918352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e40d92c6a1'
+down_revision: Union[str, Sequence[str], None] = 'a3c58e71d209'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('reviews', sa.Column('claimed_by', sa.Integer(), nullable=True))
+    op.add_column('reviews', sa.Column('claim_expires_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key(op.f('reviews_claimed_by_fkey'), 'reviews', 'users', ['claimed_by'], ['id'])
+    op.create_index(
+        'ix_reviews_pending_queue', 'reviews', ['created_at', 'id'], unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_pending_queue', table_name='reviews', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_constraint(op.f('reviews_claimed_by_fkey'), 'reviews', type_='foreignkey')
+    op.drop_column('reviews', 'claim_expires_at')
+    op.drop_column('reviews', 'claimed_by')
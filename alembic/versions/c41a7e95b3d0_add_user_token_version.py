@@ -0,0 +1,28 @@
+"""add user token version
+
+Revision ID: c41a7e95b3d0
+Revises: f0b3d6a8e214
+Create Date: 2026-10-18 18:12:47.203915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41a7e95b3d0'
+down_revision: Union[str, Sequence[str], None] = 'f0b3d6a8e214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,34 @@
+"""add review keyset indexes
+
+Revision ID: c47a9e2f1d38
+Revises: 8b31f0d4e6a2
+Create Date: 2026-10-18 13:20:07.551940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a9e2f1d38'
+down_revision: Union[str, Sequence[str], None] = '8b31f0d4e6a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_reviews_company_status_created_id', 'reviews', ['company_id', 'status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_company_created_id', 'reviews', ['company_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_status_created_id', 'reviews', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_reviews_created_id', 'reviews', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_created_id', table_name='reviews')
+    op.drop_index('ix_reviews_status_created_id', table_name='reviews')
+    op.drop_index('ix_reviews_company_created_id', table_name='reviews')
+    op.drop_index('ix_reviews_company_status_created_id', table_name='reviews')
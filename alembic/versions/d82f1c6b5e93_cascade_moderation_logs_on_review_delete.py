@@ -0,0 +1,30 @@
+"""cascade moderation logs on review delete
+
+Revision ID: d82f1c6b5e93
+Revises: b7e40d92c6a1
+Create Date: 2026-10-18 16:05:52.377140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd82f1c6b5e93'
+down_revision: Union[str, Sequence[str], None] = 'b7e40d92c6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint('moderation_logs_review_id_fkey', 'moderation_logs', type_='foreignkey')
+    op.create_foreign_key('moderation_logs_review_id_fkey', 'moderation_logs', 'reviews', ['review_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('moderation_logs_review_id_fkey', 'moderation_logs', type_='foreignkey')
+    op.create_foreign_key('moderation_logs_review_id_fkey', 'moderation_logs', 'reviews', ['review_id'], ['id'])
@@ -0,0 +1,39 @@
+"""add company review counters
+
+Revision ID: e19b6c3a8f47
+Revises: c47a9e2f1d38
+Create Date: 2026-10-18 14:02:51.274118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19b6c3a8f47'
+down_revision: Union[str, Sequence[str], None] = 'c47a9e2f1d38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('companies', sa.Column('review_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('companies', sa.Column('rating_sum', sa.Float(), nullable=False, server_default='0'))
+    # Backfill from verified reviews
+    op.execute("""
+        UPDATE companies SET
+            review_count = (SELECT count(*) FROM reviews WHERE reviews.company_id = companies.id AND reviews.status = 'verified'),
+            rating_sum = (SELECT coalesce(sum(rating), 0) FROM reviews WHERE reviews.company_id = companies.id AND reviews.status = 'verified')
+    """)
+    op.execute("""
+        UPDATE companies SET rating = CASE WHEN review_count > 0 THEN rating_sum / review_count ELSE 0 END
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('companies', 'rating_sum')
+    op.drop_column('companies', 'review_count')
@@ -0,0 +1,38 @@
+"""add company listing indexes
+
+Revision ID: e5a91f3d7c28
+Revises: d82f1c6b5e93
+Create Date: 2026-10-18 16:31:40.581903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a91f3d7c28'
+down_revision: Union[str, Sequence[str], None] = 'd82f1c6b5e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset cursors compare (rating, id) tuples, which NULL would break
+    op.execute("UPDATE companies SET rating = 0 WHERE rating IS NULL")
+    op.alter_column('companies', 'rating', existing_type=sa.Float(), nullable=False)
+    op.create_index('ix_companies_rating_id', 'companies', ['rating', 'id'], unique=False)
+    op.create_index('ix_companies_created_id', 'companies', ['created_at', 'id'], unique=False)
+    op.create_index('ix_companies_industry_rating_id', 'companies', ['industry', 'rating', 'id'], unique=False)
+    op.create_index('ix_companies_location', 'companies', ['location'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_companies_location', table_name='companies')
+    op.drop_index('ix_companies_industry_rating_id', table_name='companies')
+    op.drop_index('ix_companies_created_id', table_name='companies')
+    op.drop_index('ix_companies_rating_id', table_name='companies')
+    op.alter_column('companies', 'rating', existing_type=sa.Float(), nullable=True)
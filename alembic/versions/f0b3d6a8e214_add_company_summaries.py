@@ -0,0 +1,45 @@
+"""add company summaries
+
+Revision ID: f0b3d6a8e214
+Revises: e5a91f3d7c28
+Create Date: 2026-10-18 17:02:13.640558
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0b3d6a8e214'
+down_revision: Union[str, Sequence[str], None] = 'e5a91f3d7c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Salary medians come from the quantile sketches, which SQL cannot merge; fill the
+    table with `python -m app.commands.rebuild_company_summaries` after upgrading.
+    """
+    op.create_table('company_summaries',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('rating_1', sa.Integer(), nullable=False),
+    sa.Column('rating_2', sa.Integer(), nullable=False),
+    sa.Column('rating_3', sa.Integer(), nullable=False),
+    sa.Column('rating_4', sa.Integer(), nullable=False),
+    sa.Column('rating_5', sa.Integer(), nullable=False),
+    sa.Column('salary_count', sa.Integer(), nullable=False),
+    sa.Column('salary_median', sa.Float(), nullable=True),
+    sa.Column('top_positions', sa.JSON(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('company_summaries')
@@ -0,0 +1,44 @@
+"""add review search vector
+
+Revision ID: f6d20b8e4c15
+Revises: e19b6c3a8f47
+Create Date: 2026-10-18 14:47:33.610425
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6d20b8e4c15'
+down_revision: Union[str, Sequence[str], None] = 'e19b6c3a8f47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    PostgreSQL only: a generated tsvector column stays current on every
+    INSERT/UPDATE of reviews. SQLite builds its FTS5 table lazily at runtime.
+    """
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("""
+        ALTER TABLE reviews ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(pros, '') || ' ' || coalesce(cons, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(content, '')), 'C')
+        ) STORED
+    """)
+    op.create_index('ix_reviews_search_vector', 'reviews', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_reviews_search_vector', table_name='reviews')
+    op.drop_column('reviews', 'search_vector')
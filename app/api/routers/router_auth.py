@@ -1,15 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.services.auth_service import AuthService
-from app.schemas.user_schema import UserBaseSchema, UserCreateSchema, UserResponseSchema, TokenSchema
+from app.schemas.user_schema import UserBaseSchema, UserCreateSchema, UserResponseSchema, TokenSchema, UserAccessUpdate, UserAccessResponse
+from app.schemas.review_schema import ClaimedReviews, ReleaseClaimsRequest, ModerationQueueStats
+from app.services.moderation_queue_service import ModerationQueueService, DEFAULT_LEASE_SECONDS, MAX_CLAIM_BATCH
 from app.models.user_model import UserModel, UserRole
-from app.core.security import decode_access_token
 from app.core.config import settings
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 from authlib.integrations.httpx_client import AsyncOAuth2Client
-from app.core.roles import require_admin, require_moderator
+from app.core.roles import require_admin, require_staff
 import secrets
 import httpx
 
@@ -60,26 +61,20 @@ async def login_user(
 
 @router.post("/refresh", response_model=TokenSchema)
 async def refresh_token(
-    token: str,
+    refresh_token: str,
     auth_service: AuthService = Depends(get_auth_service)
 ):
-    payload = decode_access_token(token)
-    if payload == "JWT None":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    user_id = payload.get("sub")
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    # Получаем пользователя
-    user = await auth_service.get_current_user(token)
-    token_data = await auth_service.create_token(user)
-    return token_data
+    """Новая пара токенов по refresh токену; каждый refresh токен одноразовый"""
+    return await auth_service.rotate_refresh_token(refresh_token)
+
+@router.post("/logout")
+async def logout(
+    refresh_token: str,
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """Выход: отзывает refresh токен и все access токены этой сессии"""
+    await auth_service.logout(refresh_token)
+    return {"message": "Logged out"}
 
 @router.get("/me", response_model=UserResponseSchema)
 async def get_me(
@@ -108,6 +103,20 @@ async def create_user_by_admin(
     )
     return new_user
 
+@router.patch("/admin/users/{user_id}/access", response_model=UserAccessResponse)
+async def update_user_access(
+    user_id: int,
+    data: UserAccessUpdate,
+    user = Depends(require_admin),
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """Смена роли или блокировка пользователя; действует сразу во всех воркерах (кэш principal сбрасывается)"""
+    return await auth_service.update_user_access(
+        user_id,
+        role=data.role.value if data.role else None,
+        is_active=data.is_active
+    )
+
 @router.get("/admin/dashboard")
 async def admin_dashboard(user = Depends(require_admin)):
     return {
@@ -116,13 +125,41 @@ async def admin_dashboard(user = Depends(require_admin)):
         "role": user.role
     }
 
-@router.get("/moderator/reviews")
-async def moderator_reviews(user = Depends(require_moderator)):
-    return {
-        "message": "Pending reviews for moderation",
-        "moderator": user.email,
-        "role": user.role
-    }
+def get_moderation_queue_service(db: AsyncSession = Depends(get_db)):
+    return ModerationQueueService(db)
+
+@router.get("/moderator/reviews", response_model=ClaimedReviews)
+async def moderator_reviews(
+    limit: int = Query(20, ge=1, le=MAX_CLAIM_BATCH),
+    lease_seconds: int = Query(DEFAULT_LEASE_SECONDS, ge=30, le=86400),
+    user = Depends(require_staff),
+    queue: ModerationQueueService = Depends(get_moderation_queue_service)
+):
+    """
+    Очередь модерации: выдает пачку pending-отзывов и закрепляет их за модератором до claim_expires_at.
+    Параллельные модераторы никогда не получают один и тот же отзыв (FOR UPDATE SKIP LOCKED).
+    Повторный запрос возвращает свои же отзывы и продлевает аренду.
+    """
+    reviews, expires_at = await queue.claim(user.id, limit, lease_seconds)
+    return {"claim_expires_at": expires_at, "reviews": reviews}
+
+@router.post("/moderator/reviews/release")
+async def release_moderator_reviews(
+    payload: ReleaseClaimsRequest,
+    user = Depends(require_staff),
+    queue: ModerationQueueService = Depends(get_moderation_queue_service)
+):
+    """Вернуть отзывы в очередь (без review_ids - все свои)"""
+    released = await queue.release(user.id, payload.review_ids)
+    return {"released": released}
+
+@router.get("/moderator/queue/stats", response_model=ModerationQueueStats)
+async def moderator_queue_stats(
+    user = Depends(require_staff),
+    queue: ModerationQueueService = Depends(get_moderation_queue_service)
+):
+    """Глубина очереди, возраст самого старого отзыва и латентность claim в этом процессе"""
+    return await queue.stats()
 
 # Google OAuth routes with Authlib
 @router.get("/google/login")
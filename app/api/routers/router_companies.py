@@ -1,9 +1,15 @@
-from fastapi import APIRouter,Depends,HTTPException,Query
+from fastapi import APIRouter,Depends,HTTPException,Query,Request,Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.schemas.company_schema import CompanyResponse,CompanyCreate,CompanyUpdate
-from app.services.company_service import CompanyService
+from app.schemas.company_schema import CompanyResponse,CompanyCreate,CompanyUpdate,CompanyDetailResponse,CompanySuggestion,LeaderboardEntry,CompanyCompareResponse
+from app.services.company_service import CompanyService,COMPARE_MAX_COMPANIES
+from app.services.company_summary_service import CompanySummaryService
+from app.services.company_autocomplete import search_companies
 from app.core.roles import require_admin,require_moderator
+from app.utils.pagination import set_page_headers
+from app.core.cache import cache_stats
+from app.core.http_cache import conditional,make_etag,company_key,COMPANIES_KEY
+from datetime import datetime
 from typing import List,Optional
 
 
@@ -25,20 +31,107 @@ async def create_company(
 
 @router.get("/", response_model=List[CompanyResponse])
 async def get_companies(
+    request: Request,
+    response: Response,
+    industry: Optional[str] = None,
+    location: Optional[str] = None,
+    is_public: Optional[bool] = None,
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    sort: str = Query("name", pattern="^(name|rating|created_at)$"),
+    order: Optional[str] = Query(None, pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     company_service: CompanyService = Depends(get_company_service)
 ):
-    return await company_service.get_all_companies()
+    """
+    Список компаний постранично (keyset) с фильтрами.
+    Тело ответа - как раньше, список; курсоры в X-Next-Cursor/X-Prev-Cursor,
+    примерное общее количество в X-Total-Count.
+    ETag - от поколения списка компаний; совпал If-None-Match - 304 без запроса к БД.
+    """
+    version = await company_service.listing_version()
+    # Redis недоступен - поколения нет, отдаем без валидаторов
+    if version is not None:
+        etag = make_etag("companies", version, industry, location, is_public, min_rating, sort, order, limit, cursor)
+        not_modified = conditional(request, response, etag, surrogate_keys=[COMPANIES_KEY])
+        if not_modified:
+            return not_modified
+    page = await company_service.list_companies(industry, location, is_public, min_rating, sort, order, limit, cursor)
+    set_page_headers(response, page)
+    total = await company_service.estimate_company_count(industry, location, is_public, min_rating)
+    response.headers["X-Total-Count"] = str(total)
+    return page.items
+
+# ВАЖНО: объявлен до /{company_id}, иначе "autocomplete" попадет в company_id
+@router.get("/autocomplete",response_model=List[CompanySuggestion])
+async def autocomplete_companies(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Подсказки по префиксу названия из in-memory индекса, без запросов к БД; лучшие по рейтингу сверху"""
+    return search_companies(q, limit)
+
+@router.get("/leaderboard",response_model=List[LeaderboardEntry])
+async def get_leaderboard(
+    response: Response,
+    metric: str = Query("rating", pattern="^(rating|review_count|salary_median)$"),
+    industry: Optional[str] = None,
+    offset: int = Query(0, ge=0, le=10000),
+    limit: int = Query(20, ge=1, le=100),
+    company_service: CompanyService = Depends(get_company_service)
+):
+    """
+    Топ компаний по рейтингу / числу отзывов / медианной зарплате, по всем или внутри отрасли.
+    Ранжирование - из sorted set в Redis; размер рейтинга в X-Total-Count.
+    """
+    entries, total = await company_service.get_leaderboard(metric, industry, offset, limit)
+    response.headers["X-Total-Count"] = str(total)
+    return entries
+
+@router.get("/compare",response_model=CompanyCompareResponse)
+async def compare_companies(
+    ids: List[int] = Query(...),
+    company_service: CompanyService = Depends(get_company_service)
+):
+    """Сравнение компаний: поля, агрегаты отзывов и зарплат за фиксированное число запросов (?ids=1&ids=2)"""
+    if len(set(ids)) > COMPARE_MAX_COMPANIES:
+        raise HTTPException(status_code=400,detail=f"At most {COMPARE_MAX_COMPANIES} companies can be compared")
+    return await company_service.compare_companies(ids)
+
+@router.get("/cache/stats")
+async def company_cache_stats(_user = Depends(require_admin)):
+    """Попадания/промахи кэша компаний в этом процессе (error - Redis недоступен, ответ из БД)"""
+    return {name: cache_stats[name] for name in ("company", "company_list")}
 
 @router.get("/{company_id}",response_model=CompanyResponse)
 async def get_company(
     company_id:int,
+    request: Request,
+    response: Response,
     company_service: CompanyService = Depends(get_company_service)
 ):
-    company = await company_service.get_company(company_id)
+    """ETag/Last-Modified - от updated_at из закэшированного payload, 304 отдается до сериализации"""
+    company = await company_service.get_company_cached(company_id)
     if not company:
         raise HTTPException(status_code=404,detail="Company not found")
+    updated_at = datetime.fromisoformat(company["updated_at"])
+    etag = make_etag("company", company_id, company["updated_at"])
+    not_modified = conditional(request, response, etag, updated_at, [company_key(company_id), COMPANIES_KEY])
+    if not_modified:
+        return not_modified
     return company
 
+@router.get("/{company_id}/detail",response_model=CompanyDetailResponse)
+async def get_company_detail(
+    company_id:int,
+    db:AsyncSession = Depends(get_db)
+):
+    """Страница компании одним запросом: компания + разбивка рейтинга, медиана зарплат, топ позиций"""
+    detail = await CompanySummaryService(db).get_detail(company_id)
+    if not detail:
+        raise HTTPException(status_code=404,detail="Company not found")
+    return detail
+
 @router.patch("/{company_id}",response_model=CompanyResponse)
 async def update_company(
     company_id:int,
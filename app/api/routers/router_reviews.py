@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.models.review_model import ReviewModel  
-from app.schemas.review_schema import ReviewCreate, ReviewResponse, ReviewUpdate  
-from app.services.review_service import ReviewService 
+from app.schemas.review_schema import ReviewCreate, ReviewResponse, ReviewUpdate, BatchModerationRequest, BatchModerationResult
+from app.services.review_service import ReviewService,REVIEW_EXPORT_COLUMNS
 from app.services.auth_service import AuthService
+from app.core.roles import require_admin, require_staff
+from app.utils.export import streaming_export
+from app.utils.pagination import set_page_headers
+from app.core.http_cache import conditional, make_etag, review_key, company_reviews_key
 from typing import List
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
@@ -22,23 +26,80 @@ async def create_review(
     auth_service: AuthService = Depends(get_auth_service),
     token: str = Query(...)
 ):
-    user = await auth_service.get_current_user(token)
+    user = await auth_service.get_current_principal(token)
     return await review_service.create_review(review, user.id)
 
 @router.get("/", response_model=List[ReviewResponse])
 async def get_all_reviews(
+    response: Response,
     status: str = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None),
     review_service: ReviewService = Depends(get_review_service)
 ):
-    return await review_service.get_all_reviews(status, skip, limit)
+    """Новые сверху. Следующая/предыдущая страница - по курсорам из X-Next-Cursor / X-Prev-Cursor"""
+    page = await review_service.get_all_reviews(status, skip, limit, cursor)
+    set_page_headers(response, page)
+    return page.items
+
+# /search и /export объявлены до /{review_id}, иначе путь попадёт в review_id
+@router.get("/search", response_model=List[ReviewResponse])
+async def search_reviews(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, pattern=r"\S"),
+    company_id: int | None = None,
+    status: str = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None),
+    review_service: ReviewService = Depends(get_review_service)
+):
+    """Полнотекстовый поиск по title/content/pros/cons, самые релевантные сверху"""
+    page = await review_service.search_reviews(q, company_id, status, limit, cursor)
+    set_page_headers(response, page)
+    return page.items
+
+@router.get("/export")
+async def export_reviews(
+    company_id: int | None = None,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    _user = Depends(require_admin)
+):
+    """Полная выгрузка отзывов (NDJSON или CSV) потоком, без загрузки в память"""
+    return streaming_export(
+        lambda db: ReviewService(db).export_batches(company_id),
+        REVIEW_EXPORT_COLUMNS,
+        format,
+        f"reviews-{company_id}" if company_id else "reviews"
+    )
+
+@router.post("/moderation/batch", response_model=BatchModerationResult)
+async def moderate_reviews_batch(
+    payload: BatchModerationRequest,
+    user = Depends(require_staff),
+    review_service: ReviewService = Depends(get_review_service)
+):
+    """Пакетная модерация: один UPDATE, один INSERT логов, одна транзакция; результат по каждому id"""
+    return await review_service.moderate_reviews(
+        [(decision.review_id, decision.status) for decision in payload.decisions],
+        moderator_id=user.id
+    )
 
 @router.get("/{review_id}", response_model=ReviewResponse)
 async def get_review(
     review_id: int,
+    request: Request,
+    response: Response,
     review_service: ReviewService = Depends(get_review_service)
 ):
+    """Сначала читается только updated_at: если клиентская копия актуальна - 304 без загрузки отзыва"""
+    updated_at = await review_service.get_review_updated_at(review_id)
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    etag = make_etag("review", review_id, updated_at.isoformat())
+    not_modified = conditional(request, response, etag, updated_at, [review_key(review_id)])
+    if not_modified:
+        return not_modified
     review = await review_service.get_review(review_id)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
@@ -47,11 +108,27 @@ async def get_review(
 @router.get("/company/{company_id}", response_model=List[ReviewResponse])
 async def get_company_reviews(
     company_id: int,
+    request: Request,
+    response: Response,
+    status: str = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None),
     review_service: ReviewService = Depends(get_review_service)
 ):
-    return await review_service.get_reviews_by_company(company_id, skip, limit)
+    """
+    Новые сверху. Следующая/предыдущая страница - по курсорам из X-Next-Cursor / X-Prev-Cursor.
+    ETag - от поколения отзывов компании, которое сдвигает каждая запись.
+    """
+    version = await review_service.company_reviews_version(company_id)
+    if version is not None:
+        etag = make_etag("company-reviews", company_id, version, status, skip, limit, cursor)
+        not_modified = conditional(request, response, etag, surrogate_keys=[company_reviews_key(company_id)])
+        if not_modified:
+            return not_modified
+    page = await review_service.get_reviews_by_company(company_id, skip, limit, cursor, status)
+    set_page_headers(response, page)
+    return page.items
 
 @router.patch("/{review_id}", response_model=ReviewResponse)
 async def update_review(
@@ -61,7 +138,7 @@ async def update_review(
     auth_service: AuthService = Depends(get_auth_service),
     token: str = Query(...)
 ):
-    user = await auth_service.get_current_user(token)
+    user = await auth_service.get_current_principal(token)
     return await review_service.update_review(review_id, review_data, user)
 
 @router.delete("/{review_id}")
@@ -71,7 +148,7 @@ async def delete_review(
     auth_service: AuthService = Depends(get_auth_service),
     token: str = Query(...)
 ):
-    user = await auth_service.get_current_user(token)
+    user = await auth_service.get_current_principal(token)
     deleted = await review_service.delete_review(review_id, user)
     if not deleted:
         raise HTTPException(status_code=404, detail="Review not found or not authorized")
@@ -1,11 +1,14 @@
-from fastapi import APIRouter,Depends,HTTPException,Query
+from fastapi import APIRouter,Depends,HTTPException,Query,Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.models.salary_model import SalaryModel
-from app.schemas.salary_schema import SalaryCreate,SalaryResponse,SalaryUpdate
-from app.services.salary_service import SalaryService
+from app.schemas.salary_schema import SalaryCreate,SalaryResponse,SalaryUpdate,SalaryBulkResult
+from app.services.salary_service import SalaryService,SALARY_EXPORT_COLUMNS,SALARY_GROUP_COLUMNS
 from app.services.auth_service import AuthService
+from app.core.roles import require_admin
+from app.utils.export import streaming_export
 from typing import List
+import json
 
 router = APIRouter(prefix="/salaries",tags=["Salaries"])
 
@@ -23,11 +26,31 @@ async def create_salary(
     auth_service: AuthService = Depends(get_auth_service),
     token: str = Query(...)
 ):
-    # Логируем входящие данные для отладки
-    print(f"Создание salary: {salary.model_dump()}")
-    user = await auth_service.get_current_user(token)
+    user = await auth_service.get_current_principal(token)
     return await salary_service.create_salary(salary,user.id)
 
+@router.post('/bulk',response_model=SalaryBulkResult)
+async def bulk_create_salaries(
+    request: Request,
+    salary_service:SalaryService = Depends(get_salary_service),
+    auth_service: AuthService = Depends(get_auth_service),
+    token: str = Query(...)
+):
+    """Массовая загрузка: JSON-массив или NDJSON (Content-Type: application/x-ndjson)"""
+    user = await auth_service.get_current_principal(token)
+    body = await request.body()
+    if "ndjson" in request.headers.get("content-type",""):
+        # Строки валидируются pydantic напрямую из JSON, без json.loads
+        entries = (line for line in body.splitlines() if line.strip())
+    else:
+        try:
+            entries = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400,detail="Body must be a JSON array or NDJSON")
+        if not isinstance(entries,list):
+            raise HTTPException(status_code=400,detail="Body must be a JSON array or NDJSON")
+    return await salary_service.bulk_create(entries,user.id)
+
 @router.get('/company/{company_id}',response_model=List[SalaryResponse])
 async def get_company_salary(
     company_id:int,
@@ -38,6 +61,20 @@ async def get_company_salary(
 ):
     return await salary_service.get_salary_by_company(company_id,position,skip,limit)
 
+@router.get('/export')
+async def export_salaries(
+    company_id: int | None = None,
+    format: str = Query("ndjson",pattern="^(ndjson|csv)$"),
+    _user = Depends(require_admin)
+):
+    """Полная выгрузка зарплат (NDJSON или CSV) потоком, без загрузки в память"""
+    return streaming_export(
+        lambda db: SalaryService(db).export_batches(company_id),
+        SALARY_EXPORT_COLUMNS,
+        format,
+        f"salaries-{company_id}" if company_id else "salaries"
+    )
+
 @router.patch('/{salary_id}',response_model=SalaryResponse)
 async def update_salary(
     salary_id:int,
@@ -46,7 +83,7 @@ async def update_salary(
     auth_service:AuthService = Depends(get_auth_service),
     token: str = Query(...)
 ):
-    user = await auth_service.get_current_user(token)
+    user = await auth_service.get_current_principal(token)
     return await salary_service.update_salary(salary_id,salary_data,user)
 
 @router.delete('/{salary_id}')
@@ -56,7 +93,7 @@ async def delete_salary(
     auth_service: AuthService = Depends(get_auth_service),
     token: str = Query(...)
 ):
-    user = await auth_service.get_current_user(token)
+    user = await auth_service.get_current_principal(token)
     deleted_salary = await salary_service.delete_salary(salary_id,user)
     if not deleted_salary:
         raise HTTPException(status_code=404,detail="Salary not found or not authorized")
@@ -67,6 +104,34 @@ async def delete_salary(
 async def get_salary_statistics(
     company_id:int | None = None,
     position: str | None = None,
+    exact: bool = False,
+    salary_service: SalaryService = Depends(get_salary_service)
+):
+    """Статистика зарплат. Квартили интерполируются как в statistics.quantiles;
+    при approximate=true они взяты из скетча (погрешность около 1%), иначе точные"""
+    return await salary_service.get_salary_statistics(company_id,position,exact)
+
+@router.get('/distribution')
+async def get_salary_distribution(
+    company_id:int | None = None,
+    position: str | None = None,
+    bins: int = Query(20,ge=1,le=200),
+    strategy: str = Query("fixed",pattern="^(fixed|quantile)$"),
+    salary_service: SalaryService = Depends(get_salary_service)
+):
+    """Гистограмма зарплат: равные интервалы (fixed) или равные доли (quantile)"""
+    return await salary_service.get_salary_distribution(company_id,position,bins,strategy)
+
+@router.get('/statistics/grouped')
+async def get_grouped_salary_statistics(
+    company_id:int | None = None,
+    group_by: List[str] = Query(["position"]),
+    skip: int = Query(0,ge=0),
+    limit: int = Query(50,ge=1,le=500),
     salary_service: SalaryService = Depends(get_salary_service)
 ):
-    return await salary_service.get_salary_statistics(company_id,position)
+    """Статистика по группам (position, location, experience) одним запросом"""
+    unknown = set(group_by) - set(SALARY_GROUP_COLUMNS)
+    if unknown or not group_by:
+        raise HTTPException(status_code=400,detail=f"group_by must be one or more of: {', '.join(SALARY_GROUP_COLUMNS)}")
+    return await salary_service.get_grouped_statistics(company_id,list(dict.fromkeys(group_by)),skip,limit)
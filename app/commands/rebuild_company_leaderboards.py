@@ -0,0 +1,20 @@
+"""Refill the company leaderboards in Redis from the database, e.g. after Redis lost them.
+
+Run after rebuild_company_summaries when both need rebuilding; the salary board reads
+its medians from company_summaries.
+
+Usage: python -m app.commands.rebuild_company_leaderboards
+"""
+import asyncio
+from app.db.session import async_session
+from app.services.company_leaderboard import rebuild_leaderboards
+
+
+async def main():
+    async with async_session() as db:
+        filed = await rebuild_leaderboards(db)
+    print(f"company leaderboards rebuilt: {filed} companies")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,19 @@
+"""Recompute company_summaries from reviews and salary_aggregates.
+
+Run after rebuild_salary_aggregates when both need rebuilding.
+
+Usage: python -m app.commands.rebuild_company_summaries
+"""
+import asyncio
+from app.db.session import async_session
+from app.services.company_summary_service import CompanySummaryService
+
+
+async def main():
+    async with async_session() as db:
+        rows = await CompanySummaryService(db).rebuild()
+    print(f"company_summaries rebuilt: {rows} companies")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,17 @@
+"""Recompute salary_aggregates from scratch.
+
+Usage: python -m app.commands.rebuild_salary_aggregates
+"""
+import asyncio
+from app.db.session import async_session
+from app.services.salary_aggregate_service import SalaryAggregateService
+
+
+async def main():
+    async with async_session() as db:
+        keys = await SalaryAggregateService(db).rebuild()
+    print(f"salary_aggregates rebuilt: {keys} keys")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
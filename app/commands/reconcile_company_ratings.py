@@ -0,0 +1,17 @@
+"""Repair drift in the denormalized company rating counters.
+
+Usage: python -m app.commands.reconcile_company_ratings
+"""
+import asyncio
+from app.db.session import async_session
+from app.services.company_service import CompanyService
+
+
+async def main():
+    async with async_session() as db:
+        repaired = await CompanyService(db).reconcile_ratings()
+    print(f"company ratings reconciled: {repaired} companies repaired")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
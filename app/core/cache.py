@@ -0,0 +1,138 @@
+import itertools
+import json
+import time
+from collections import defaultdict
+from app.core.redis_client import cache_redis_client as redis_client
+
+# Redis is an optimization only: every helper degrades to a cache miss when it is unavailable
+
+# After a Redis error, skip Redis entirely for this long instead of paying a timeout per call
+BREAKER_COOLDOWN = 5.0
+_breaker_open_until = 0.0
+
+# name -> {"hit": n, "miss": n, "error": n} for this process
+cache_stats: dict[str, dict[str, int]] = defaultdict(lambda: {"hit": 0, "miss": 0, "error": 0})
+
+
+def _available() -> bool:
+    return time.monotonic() >= _breaker_open_until
+
+
+def _trip() -> None:
+    global _breaker_open_until
+    _breaker_open_until = time.monotonic() + BREAKER_COOLDOWN
+
+
+def _record(stats: str | None, outcome: str) -> None:
+    if stats:
+        cache_stats[stats][outcome] += 1
+
+
+# Invalidations that failed in this process, key or namespace -> failure sequence number.
+# They are applied before any later read, since once Redis is back the entries and
+# generations they were meant to drop would be served (and 304'd) as current again.
+_pending_deletes: dict[str, int] = {}
+_pending_bumps: dict[str, int] = {}
+_failure_seq = itertools.count()
+
+
+def _defer(pending: dict[str, int], names) -> None:
+    seq = next(_failure_seq)
+    for name in names:
+        pending[name] = seq
+
+
+async def _apply_pending() -> bool:
+    """Retry failed invalidations; False while they still cannot be applied."""
+    if not _pending_deletes and not _pending_bumps:
+        return True
+    deletes, bumps = dict(_pending_deletes), dict(_pending_bumps)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            if deletes:
+                pipe.delete(*deletes)
+            for name in bumps:
+                pipe.incr(f"cache_version:{name}")
+            await pipe.execute()
+    except Exception:
+        _trip()
+        return False
+    # Keep anything that failed again while this ran; it needs another attempt
+    for pending, applied in ((_pending_deletes, deletes), (_pending_bumps, bumps)):
+        for name, seq in applied.items():
+            if pending.get(name) == seq:
+                del pending[name]
+    return True
+
+
+async def cache_get_json(key: str, stats: str | None = None):
+    if not _available() or not await _apply_pending():
+        _record(stats, "error")
+        return None
+    try:
+        raw = await redis_client.get(key)
+    except Exception:
+        _trip()
+        _record(stats, "error")
+        return None
+    _record(stats, "hit" if raw else "miss")
+    return json.loads(raw) if raw else None
+
+
+async def cache_set_json(key: str, value, ttl: int) -> None:
+    if not _available():
+        return
+    try:
+        await redis_client.set(key, json.dumps(value), ex=ttl)
+    except Exception:
+        _trip()
+
+
+async def cache_delete(*keys: str) -> None:
+    # Invalidations ignore the breaker: dropping one would leave stale entries until their TTL
+    if not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except Exception:
+        _trip()
+        _defer(_pending_deletes, keys)
+
+
+async def cache_version(name: str) -> int:
+    """Current generation of a cache namespace; part of the key of every entry in it."""
+    return await cache_version_or_none(name) or 0
+
+
+async def cache_version_or_none(name: str) -> int | None:
+    """Like cache_version, but None when Redis cannot say, for callers that must not guess (ETags).
+
+    Also None until a bump that failed in this process has been applied.
+    """
+    if not _available() or not await _apply_pending():
+        return None
+    key = f"cache_version:{name}"
+    try:
+        version = await redis_client.get(key)
+        if version is None:
+            # Seed from the clock so a flushed Redis never hands out a generation seen before
+            await redis_client.set(key, time.time_ns() // 1000, nx=True)
+            version = await redis_client.get(key)
+        return int(version)
+    except Exception:
+        _trip()
+        return None
+
+
+async def bump_cache_version(*names: str) -> None:
+    """Invalidate whole namespaces at once by moving them to a new generation."""
+    if not names:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.incr(f"cache_version:{name}")
+            await pipe.execute()
+    except Exception:
+        _trip()
+        _defer(_pending_bumps, names)
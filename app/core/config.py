@@ -6,12 +6,30 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     DATABASE_URL: str
     REDIS_URL: str | None = None
+    REDIS_CACHE_TIMEOUT: float = 0.25
+    CDN_PURGE_URL: str | None = None
+    CDN_MAX_AGE: int = 60
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     ALGORITHM: str = "HS256"
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60
+    PRINCIPAL_SHARED_TTL: int = 300
+    TOKEN_VERSION_REFRESH_SECONDS: float = 30
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_REFRESH_SECONDS: float = 60
+    PASSWORD_HASH_ROUNDS: int | None = None
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
     PROJECT_NAME: str = "IWork Backend"
     OAUTH_GOOGLE_CLIENT_ID: str
     OAUTH_GOOGLE_CLIENT_SECRET: str
+    MODERATION_LEXICON_PATH: str | None = None
+    MODERATION_WORKERS: int = 2
+    MODERATION_QUEUE_SIZE: int = 10000
+    MODERATION_BATCH_SIZE: int = 100
+    MODERATION_FLAG_THRESHOLD: float = 0.5
+    MODERATION_REDIS_STREAM: bool = False
 
     model_config = {
         "env_file": ".env",
@@ -0,0 +1,88 @@
+import asyncio
+import inspect
+import json
+import logging
+import uuid
+
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+class EventBus:
+    """Broadcasts small JSON events to every app process over Redis pub/sub.
+
+    Used to keep per-process in-memory state (indexes, caches) in step across workers.
+    Delivery is best effort: a process that is disconnected misses events, so state kept
+    this way must also be refreshed periodically. Events a process publishes are not
+    delivered back to it; callers apply their own changes locally.
+    """
+
+    def __init__(self):
+        self.instance_id = uuid.uuid4().hex
+        self._handlers: dict[str, list] = {}
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, handler) -> None:
+        """Register `handler(payload)` (sync or async) for a channel. Call before `start`."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def publish(self, channel: str, payload: dict) -> None:
+        try:
+            await redis_client.publish(channel, json.dumps({"origin": self.instance_id, "payload": payload}))
+        except Exception:
+            logger.warning("event publish to %s failed", channel)
+
+    async def start(self) -> None:
+        if self._handlers and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self) -> None:
+        delay = RECONNECT_DELAY
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*self._handlers)
+                delay = RECONNECT_DELAY
+                async for message in pubsub.listen():
+                    await self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("event subscription lost, retrying in %.0fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def _dispatch(self, message: dict) -> None:
+        if message.get("type") != "message":
+            return
+        try:
+            event = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if event.get("origin") == self.instance_id:
+            return
+        for handler in self._handlers.get(message["channel"], ()):
+            try:
+                result = handler(event.get("payload"))
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("event handler for %s failed", message["channel"])
+
+
+event_bus = EventBus()
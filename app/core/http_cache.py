@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable
+
+import httpx
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PURGE_TIMEOUT = 2.0
+# Browsers always revalidate (cheap with ETag); shared caches may serve for CDN_MAX_AGE
+CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+_purge_tasks: set[asyncio.Task] = set()
+
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20] + '"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # updated_at columns hold naive UTC (datetime.utcnow)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """RFC 9110 evaluation: If-None-Match wins; If-Modified-Since only when it is absent."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: a W/ prefix added by a proxy still matches
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def cache_headers(etag: str, last_modified: datetime | None = None, surrogate_keys: Iterable[str] = ()) -> dict[str, str]:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Surrogate-Control": f"max-age={settings.CDN_MAX_AGE}",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified).replace(microsecond=0), usegmt=True)
+    keys = " ".join(surrogate_keys)
+    if keys:
+        headers["Surrogate-Key"] = keys
+    return headers
+
+
+def conditional(request: Request, response: Response, etag: str, last_modified: datetime | None = None, surrogate_keys: Iterable[str] = ()) -> Response | None:
+    """Set validators on `response`; return a 304 to send instead when the client's copy is current.
+
+    Call before loading or serializing the body.
+    """
+    headers = cache_headers(etag, last_modified, surrogate_keys)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def purge_surrogate_keys(*keys: str) -> None:
+    """Ask the CDN to drop everything tagged with these keys. Fire and forget; no-op without CDN_PURGE_URL."""
+    if not settings.CDN_PURGE_URL or not keys:
+        return
+    task = asyncio.create_task(_purge(keys))
+    _purge_tasks.add(task)
+    task.add_done_callback(_purge_tasks.discard)
+
+
+async def _purge(keys: tuple[str, ...]) -> None:
+    try:
+        async with httpx.AsyncClient(timeout=PURGE_TIMEOUT) as client:
+            response = await client.post(settings.CDN_PURGE_URL, json={"surrogate_keys": list(keys)})
+            response.raise_for_status()
+    except Exception:
+        logger.warning("CDN purge failed for %s", keys)
+
+
+def company_key(company_id: int) -> str:
+    return f"company-{company_id}"
+
+
+def review_key(review_id: int) -> str:
+    return f"review-{review_id}"
+
+
+def company_reviews_key(company_id: int) -> str:
+    return f"company-reviews-{company_id}"
+
+
+COMPANIES_KEY = "companies"
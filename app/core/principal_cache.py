@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import select
+
+from app.core.cache import cache_delete, cache_get_json, cache_set_json
+from app.core.config import settings
+from app.core.events import event_bus
+from app.core.redis_client import cache_redis_client
+from app.db.session import async_session
+from app.models.user_model import UserModel
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_EVENTS_CHANNEL = "events:principals"
+# user id -> current token version, for users whose version was ever bumped
+TOKEN_VERSIONS_KEY = "token_versions"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What authorization needs to know about the caller, without the full user row."""
+    id: int
+    email: str
+    role: str
+    is_active: bool
+    token_version: int = 0
+    token_family: str | None = None
+
+
+def principal_cache_key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+
+def _token_key(token: str) -> str:
+    # Tokens are credentials; keep only their digest in memory
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """Bounded LRU of verified token -> Principal, per process.
+
+    A hit skips both the JWT signature check and the user lookup. Entries expire after
+    `ttl` seconds or when their token does, whichever is first, and every entry of a
+    user is dropped when that user's role or active flag changes.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._by_user: dict[int, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Principal | None:
+        key = _token_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            self._discard(key, principal.id)
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def put(self, token: str, principal: Principal, token_expires_at: float | None = None) -> None:
+        """Cache a principal; `token_expires_at` is the token's exp claim (unix time)."""
+        lifetime = self.ttl
+        if token_expires_at is not None:
+            lifetime = min(lifetime, token_expires_at - time.time())
+        if lifetime <= 0:
+            return
+        key = _token_key(token)
+        self._entries[key] = (time.monotonic() + lifetime, principal)
+        self._entries.move_to_end(key)
+        self._by_user.setdefault(principal.id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            oldest, (_, evicted) = next(iter(self._entries.items()))
+            self._discard(oldest, evicted.id)
+
+    def invalidate_user(self, user_id: int) -> None:
+        for key in self._by_user.pop(user_id, ()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    def _discard(self, key: str, user_id: int) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+
+
+async def load_shared_principal(user_id: int) -> Principal | None:
+    """The principal other processes already loaded, from Redis."""
+    cached = await cache_get_json(principal_cache_key(user_id), stats="principal")
+    return Principal(**cached) if cached is not None else None
+
+
+async def share_principal(principal: Principal) -> None:
+    await cache_set_json(principal_cache_key(principal.id), asdict(principal), settings.PRINCIPAL_SHARED_TTL)
+
+
+# Versions only ever grow, so merging from any source keeps the highest one seen.
+# Users missing here are at version 0; the map holds only users that were ever bumped.
+_token_versions: dict[int, int] = {}
+_refresh_task: asyncio.Task | None = None
+
+
+def current_token_version(user_id: int) -> int:
+    return _token_versions.get(user_id, 0)
+
+
+def _record_versions(versions: dict[int, int]) -> None:
+    for user_id, version in versions.items():
+        if version > _token_versions.get(user_id, 0):
+            _token_versions[user_id] = version
+
+
+async def load_token_versions(db=None) -> int:
+    """Merge bumped versions from the database (when given a session) and from Redis."""
+    if db is not None:
+        rows = (await db.execute(select(UserModel.id, UserModel.token_version).where(UserModel.token_version > 0))).all()
+        _record_versions({row.id: row.token_version for row in rows})
+    try:
+        shared = await cache_redis_client.hgetall(TOKEN_VERSIONS_KEY)
+    except Exception:
+        logger.warning("token versions could not be read from Redis")
+    else:
+        _record_versions({int(user_id): int(version) for user_id, version in shared.items()})
+    return len(_token_versions)
+
+
+async def _refresh_periodically() -> None:
+    # Covers version events missed while this process was disconnected from pub/sub
+    while True:
+        await asyncio.sleep(settings.TOKEN_VERSION_REFRESH_SECONDS)
+        await load_token_versions()
+
+
+async def start_token_versions() -> None:
+    """Load from the database once, then keep the map in step from Redis. Start the event bus first."""
+    global _refresh_task
+    try:
+        async with async_session() as db:
+            logger.info("token versions loaded: %d users", await load_token_versions(db))
+    except Exception:
+        logger.exception("token versions could not be loaded from the database")
+    _refresh_task = asyncio.create_task(_refresh_periodically())
+
+
+async def stop_token_versions() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+        _refresh_task = None
+
+
+def _on_principal_changed(payload: dict) -> None:
+    principal_cache.invalidate_user(payload["user_id"])
+    if payload.get("token_version") is not None:
+        _record_versions({payload["user_id"]: payload["token_version"]})
+
+
+event_bus.subscribe(PRINCIPAL_EVENTS_CHANNEL, _on_principal_changed)
+
+
+async def principal_changed(user_id: int, token_version: int | None = None) -> None:
+    """Forget a user's cached principal here, in Redis and in every other process.
+
+    With a new `token_version`, tokens issued under older versions stop being accepted.
+    """
+    payload = {"user_id": user_id, "token_version": token_version}
+    _on_principal_changed(payload)
+    await cache_delete(principal_cache_key(user_id))
+    if token_version is not None:
+        try:
+            await cache_redis_client.hset(TOKEN_VERSIONS_KEY, user_id, token_version)
+        except Exception:
+            # Other processes still get the event, and pick it up from the database on restart
+            logger.warning("token version of user %s could not be stored in Redis", user_id)
+    await event_bus.publish(PRINCIPAL_EVENTS_CHANNEL, payload)
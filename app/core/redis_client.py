@@ -1,4 +1,13 @@
 import redis.asyncio as aioredis
 from app.core.config import settings
 
-redis_client = aioredis.from_url(settings.REDIS_URL or "redis://localhost:6379", decode_responses=True) 
+redis_client = aioredis.from_url(settings.REDIS_URL or "redis://localhost:6379", decode_responses=True)
+
+# Cache reads must never wait on a slow or unreachable Redis longer than a database read would take.
+# Kept separate from redis_client, whose blocking stream reads and pub/sub need no socket timeout.
+cache_redis_client = aioredis.from_url(
+    settings.REDIS_URL or "redis://localhost:6379",
+    decode_responses=True,
+    socket_timeout=settings.REDIS_CACHE_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_CACHE_TIMEOUT,
+)
@@ -7,16 +7,17 @@ from app.models.user_model import UserRole
 def get_auth_service(db: AsyncSession = Depends(get_db)):
     return AuthService(db)
 
-def require_role(required_role: UserRole):
+def require_role(*required_roles: UserRole):
+    allowed = {role.value for role in required_roles}
     async def role_checker(
         token: str,
         auth_service: AuthService = Depends(get_auth_service)
     ):
-        user = await auth_service.get_current_user(token)
-        if user.role != required_role.value:
+        user = await auth_service.get_current_principal(token)
+        if user.role not in allowed:
             raise HTTPException(
                 status_code=403,
-                detail=f"Insufficient permissions. Required: {required_role.value}"
+                detail=f"Insufficient permissions. Required: {' or '.join(role.value for role in required_roles)}"
             )
         return user
     return role_checker
@@ -24,4 +25,5 @@ def require_role(required_role: UserRole):
 # Удобные алиасы
 require_admin = require_role(UserRole.ADMIN)
 require_moderator = require_role(UserRole.MODERATOR)
-require_user = require_role(UserRole.USER)
\ No newline at end of file
+require_user = require_role(UserRole.USER)
+require_staff = require_role(UserRole.MODERATOR, UserRole.ADMIN)
\ No newline at end of file
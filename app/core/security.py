@@ -1,9 +1,19 @@
 from datetime import datetime,timedelta
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException,status
 from jose import jwt,JWTError
 from passlib.context import CryptContext
 from app.core.config import settings
+import asyncio
+import uuid
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"],deprecated="auto")
+# min_rounds = default_rounds: hashes made with fewer rounds report needs_update and are redone on login
+_rounds = {"pbkdf2_sha256__default_rounds": settings.PASSWORD_HASH_ROUNDS,"pbkdf2_sha256__min_rounds": settings.PASSWORD_HASH_ROUNDS}
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"],deprecated="auto",**(_rounds if settings.PASSWORD_HASH_ROUNDS else {}))
+
+# pbkdf2 runs in hashlib, which releases the GIL, so threads keep the event loop free
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,thread_name_prefix="password-hash")
+_hash_pending = 0
 
 def hash_password(password:str):
     return pwd_context.hash(password)
@@ -11,6 +21,28 @@ def hash_password(password:str):
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password,hashed_password)
 
+async def _run_hashing(function,*args):
+    # Beyond the limit, queued work would only time out anyway: shed it at once
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor,function,*args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password:str) -> str:
+    return await _run_hashing(pwd_context.hash,password)
+
+async def verify_password_async(plain_password: str, hashed_password: str | None) -> tuple[bool,str | None]:
+    """(matches, new hash or None). A new hash is returned when the stored one uses outdated settings."""
+    return await _run_hashing(pwd_context.verify_and_update,plain_password,hashed_password)
+
 def create_access_token(data:dict,expires_delta: int | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_delta or settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -18,6 +50,13 @@ def create_access_token(data:dict,expires_delta: int | None = None):
     encoded_jwt = jwt.encode(to_encode,settings.SECRET_KEY,algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(user_id:int,family:str) -> tuple[str,str]:
+    """A refresh token of a login session (family) and its jti, which the server tracks for rotation"""
+    jti = uuid.uuid4().hex
+    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    payload = {"sub": str(user_id),"typ": "refresh","fam": family,"jti": jti,"exp": expire}
+    return jwt.encode(payload,settings.SECRET_KEY,algorithm=settings.ALGORITHM),jti
+
 def decode_access_token(token:str):
     try:
         payload = jwt.decode(token,settings.SECRET_KEY,algorithms=[settings.ALGORITHM])
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+
+from redis.exceptions import WatchError
+
+from app.core.config import settings
+from app.core.events import event_bus
+from app.core.redis_client import cache_redis_client
+from app.utils.bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_EVENTS_CHANNEL = "events:revocations"
+# Sorted set: revoked token family -> unix time after which no token of it can still be valid
+REVOKED_FAMILIES_KEY = "revoked_families"
+
+
+def refresh_family_key(family: str) -> str:
+    # The one refresh jti of the family that may still be used
+    return f"refresh_family:{family}"
+
+
+def refresh_lifetime() -> int:
+    return settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+
+_revoked = BloomFilter(settings.REVOCATION_BLOOM_CAPACITY)
+# Families revoked while a reload is reading Redis, re-added to the filter that replaces _revoked
+_added_during_load: list[str] | None = None
+_refresh_task: asyncio.Task | None = None
+
+
+def _remember(family: str) -> None:
+    _revoked.add(family)
+    if _added_during_load is not None:
+        _added_during_load.append(family)
+
+
+event_bus.subscribe(REVOCATION_EVENTS_CHANNEL, lambda payload: _remember(payload["family"]))
+
+
+async def register_refresh_family(family: str, jti: str) -> None:
+    await cache_redis_client.set(refresh_family_key(family), jti, ex=refresh_lifetime())
+
+
+async def rotate_refresh(family: str, jti: str, new_jti: str) -> str:
+    """Swap the family's current jti for `new_jti` if `jti` is it.
+
+    Returns "rotated", "reused" (a jti that was already rotated away: the token leaked or
+    was replayed) or "unknown" (family expired or revoked). Redis errors propagate.
+    """
+    key = refresh_family_key(family)
+    async with cache_redis_client.pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                await pipe.watch(key)
+                current = await pipe.get(key)
+                if current is None:
+                    return "unknown"
+                if current != jti:
+                    return "reused"
+                pipe.multi()
+                pipe.set(key, new_jti, ex=refresh_lifetime())
+                await pipe.execute()
+                return "rotated"
+            except WatchError:
+                # Rotated concurrently; the next read sees the new jti and reports reuse
+                continue
+
+
+async def revoke_family(family: str) -> None:
+    """End a login session: its refresh token stops rotating and its access tokens are refused."""
+    async with cache_redis_client.pipeline(transaction=True) as pipe:
+        pipe.zadd(REVOKED_FAMILIES_KEY, {family: time.time() + refresh_lifetime()})
+        pipe.delete(refresh_family_key(family))
+        await pipe.execute()
+    _remember(family)
+    await event_bus.publish(REVOCATION_EVENTS_CHANNEL, {"family": family})
+
+
+async def is_family_revoked(family: str) -> bool:
+    """Answered from the local filter for almost every token.
+
+    A filter hit may be a false positive, so it is confirmed in Redis; errors propagate
+    and callers refuse the token rather than guess. Before the first successful load the
+    filter is taken as it stands, so an unreachable Redis at startup does not take every
+    authenticated request down with it (see start_revocations).
+    """
+    if family not in _revoked:
+        return False
+    expires_at = await cache_redis_client.zscore(REVOKED_FAMILIES_KEY, family)
+    return expires_at is not None and expires_at > time.time()
+
+
+async def load_revocations() -> int:
+    """Rebuild the local filter from Redis, dropping revocations that can no longer matter."""
+    global _revoked, _added_during_load
+    _added_during_load = []
+    try:
+        now = time.time()
+        await cache_redis_client.zremrangebyscore(REVOKED_FAMILIES_KEY, "-inf", now)
+        families = await cache_redis_client.zrangebyscore(REVOKED_FAMILIES_KEY, now, "+inf")
+        revoked = BloomFilter(max(settings.REVOCATION_BLOOM_CAPACITY, 2 * len(families)))
+        for family in families + _added_during_load:
+            revoked.add(family)
+        _revoked = revoked
+        return len(families)
+    finally:
+        _added_during_load = None
+
+
+async def _reload_periodically() -> None:
+    # Picks up revocations whose events were missed and lets expired ones fall out of the filter
+    while True:
+        await asyncio.sleep(settings.REVOCATION_REFRESH_SECONDS)
+        try:
+            await load_revocations()
+        except Exception:
+            logger.warning("revoked token families could not be reloaded, keeping the current filter")
+
+
+async def start_revocations() -> None:
+    """Initial load plus the periodic reload. Start the event bus first."""
+    global _refresh_task
+    try:
+        logger.info("revoked token families loaded: %d", await load_revocations())
+    except Exception:
+        # Sessions revoked before this start are accepted until a reload succeeds; their
+        # access tokens live ACCESS_TOKEN_EXPIRE_MINUTES at most and cannot be refreshed
+        logger.exception("revoked token families could not be loaded, not checked until the next reload")
+    _refresh_task = asyncio.create_task(_reload_periodically())
+
+
+async def stop_revocations() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+        _refresh_task = None
@@ -9,4 +9,6 @@ from app.models.review_model import ReviewModel
 from app.models.salary_model import SalaryModel
 from app.models.account_settings_model import AccountSettings
 from app.models.moderation_log_model import ModerationLog
+from app.models.salary_aggregate_model import SalaryAggregateModel
 
+from app.models.company_summary_model import CompanySummaryModel
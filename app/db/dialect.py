@@ -0,0 +1,60 @@
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+
+def dialect_name(db: AsyncSession) -> str:
+    return db.bind.dialect.name
+
+
+def dialect_insert(db: AsyncSession, model):
+    """INSERT construct of the session's dialect, so callers can use ON CONFLICT."""
+    if dialect_name(db) == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+async def update_returning_previous(db: AsyncSession, model, row_id, criteria, values: dict, previous: list[str]):
+    """UPDATE one row by id and return (instance, {column: value before the update}), or None.
+
+    PostgreSQL reads the old values from a locked self-join in the same statement. SQLite
+    cannot reference joined tables in RETURNING, so it reads them first; its single-writer
+    lock makes that read and the write that follows one atomic step, or fails the write.
+    """
+    if dialect_name(db) == "postgresql":
+        old = aliased(model)
+        previous_row = (
+            select(old.id, *(getattr(old, name).label(name) for name in previous))
+            .where(old.id == row_id)
+            .with_for_update()
+            .subquery("previous")
+        )
+        stmt = (
+            update(model)
+            .where(model.id == previous_row.c.id, *criteria)
+            .values(**values)
+            .returning(model, *(previous_row.c[name] for name in previous))
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            return None
+        return row[0], dict(zip(previous, row[1:]))
+
+    old_values = (await db.execute(
+        select(*(getattr(model, name) for name in previous)).where(model.id == row_id)
+    )).first()
+    if old_values is None:
+        return None
+    stmt = (
+        update(model)
+        .where(model.id == row_id, *criteria)
+        .values(**values)
+        .returning(model)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    instance = (await db.execute(stmt)).scalar_one_or_none()
+    if instance is None:
+        return None
+    return instance, dict(zip(previous, old_values))
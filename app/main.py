@@ -8,10 +8,35 @@ from app.api.routers.router_reviews import router as review_router
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.services.moderation_pipeline import moderation_pipeline
+from app.services.company_autocomplete import start_autocomplete, stop_autocomplete
+from app.core.events import event_bus
+from app.core.principal_cache import start_token_versions, stop_token_versions
+from app.core.token_revocation import start_revocations, stop_revocations
+from contextlib import asynccontextmanager
 import asyncio
 
 
-app = FastAPI(title="IWork")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Рассылка событий между воркерами (Redis pub/sub), до загрузки in-memory индексов
+    await event_bus.start()
+    # Версии токенов пользователей: отозванные токены отсекаются без запроса к БД
+    await start_token_versions()
+    # Отозванные сессии (bloom-фильтр), чтобы проверка access токена не ходила в Redis
+    await start_revocations()
+    await start_autocomplete()
+    # Фоновые воркеры автомодерации отзывов
+    await moderation_pipeline.start()
+    yield
+    await moderation_pipeline.stop()
+    await stop_autocomplete()
+    await stop_revocations()
+    await stop_token_versions()
+    await event_bus.stop()
+
+
+app = FastAPI(title="IWork", lifespan=lifespan)
 
 # КРИТИЧЕСКИ ВАЖНО: Добавляем CORS middleware
 # Без этого браузер заблокирует запросы с frontend
@@ -21,6 +46,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "X-Total-Count", "ETag", "Last-Modified"],  # курсоры пагинации, общее количество, валидаторы кэша
 )
 
 # ВАЖНО: Добавляем SessionMiddleware для работы OAuth2
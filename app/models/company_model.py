@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float,Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float,Boolean,Index
 from app.db.base import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 class CompanyModel(Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        # Listing: keyset on each sort, with the common industry filter leading
+        Index("ix_companies_rating_id", "rating", "id"),
+        Index("ix_companies_created_id", "created_at", "id"),
+        Index("ix_companies_industry_rating_id", "industry", "rating", "id"),
+        Index("ix_companies_location", "location"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
@@ -13,7 +20,10 @@ class CompanyModel(Base):
     industry = Column(String, nullable=True)
     location = Column(String, nullable=True)
     logo_url = Column(String, nullable=True)
-    rating = Column(Float, default=0.0)
+    rating = Column(Float, default=0.0, nullable=False)
+    # Denormalized from verified reviews, maintained by CompanyService.apply_rating_delta
+    review_count = Column(Integer, default=0, nullable=False)
+    rating_sum = Column(Float, default=0.0, nullable=False)
     founded_year = Column(Integer,nullable=True)
     tax_contributions = Column(Float,default=None)
     stock_price = Column(Float,nullable=True)
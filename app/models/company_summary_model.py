@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, Float, ForeignKey, JSON
+from app.db.base import Base
+from datetime import datetime
+
+
+class CompanySummaryModel(Base):
+    """Per-company figures for the detail page, kept current by CompanySummaryService."""
+    __tablename__ = "company_summaries"
+
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    # Verified reviews per rounded star rating
+    rating_1 = Column(Integer, default=0, nullable=False)
+    rating_2 = Column(Integer, default=0, nullable=False)
+    rating_3 = Column(Integer, default=0, nullable=False)
+    rating_4 = Column(Integer, default=0, nullable=False)
+    rating_5 = Column(Integer, default=0, nullable=False)
+    salary_count = Column(Integer, default=0, nullable=False)
+    salary_median = Column(Float, nullable=True)
+    top_positions = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
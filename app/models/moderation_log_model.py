@@ -7,11 +7,12 @@ class ModerationLog(Base):
     __tablename__ = "moderation_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    review_id = Column(Integer, ForeignKey("reviews.id"), nullable=False)
-    ai_score = Column(Float, nullable=False)
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), nullable=False)
+    ai_score = Column(Float, nullable=True)  # null for purely manual decisions
     flagged_words = Column(JSON, nullable=True)
     moderator_decision = Column(Text, nullable=False)
+    moderator_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     moderated_at = Column(DateTime, nullable=False)
 
     # Relationships
-    review = relationship("Review", back_populates="moderation_logs")
\ No newline at end of file
+    review = relationship("ReviewModel", back_populates="moderation_logs")
\ No newline at end of file
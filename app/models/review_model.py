@@ -1,4 +1,4 @@
-from sqlalchemy import Column,String,Integer,DateTime,Text,Float,ForeignKey,Boolean,Date
+from sqlalchemy import Column,String,Integer,DateTime,Text,Float,ForeignKey,Boolean,Date,Index,text
 from app.db.base import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,6 +13,19 @@ class ReviewStatus(str,enum.Enum):
 
 class ReviewModel(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), with and without company/status filters
+        Index("ix_reviews_company_status_created_id", "company_id", "status", "created_at", "id"),
+        Index("ix_reviews_company_created_id", "company_id", "created_at", "id"),
+        Index("ix_reviews_status_created_id", "status", "created_at", "id"),
+        Index("ix_reviews_created_id", "created_at", "id"),
+        # Moderator work queue: only pending rows, in claim order
+        Index(
+            "ix_reviews_pending_queue", "created_at", "id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
 
     id = Column(Integer,primary_key=True,index=True)
     company_id = Column(Integer,ForeignKey("companies.id"),nullable=False)
@@ -30,9 +43,11 @@ class ReviewModel(Base):
     status = Column(String,default=ReviewStatus.PENDING.value,nullable=False)
     created_at = Column(DateTime,default=datetime.utcnow)
     updated_at = Column(DateTime,default=datetime.utcnow,onupdate=datetime.utcnow)
+    claimed_by = Column(Integer,ForeignKey("users.id"),nullable=True)
+    claim_expires_at = Column(DateTime,nullable=True)
     
     # Relationships
-    user = relationship("UserModel", back_populates="reviews")
+    user = relationship("UserModel", back_populates="reviews", foreign_keys=[user_id])
     company = relationship("CompanyModel", back_populates="reviews")
-    moderation_logs = relationship("ModerationLog", back_populates="review")
+    moderation_logs = relationship("ModerationLog", back_populates="review", passive_deletes=True)
     
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON, UniqueConstraint
+from app.db.base import Base
+from datetime import datetime
+
+class SalaryAggregateModel(Base):
+    __tablename__ = "salary_aggregates"
+    __table_args__ = (
+        UniqueConstraint("company_id", "position_key", name="uq_salary_aggregates_company_position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    position_key = Column(String, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    salary_sum = Column(Float, default=0.0, nullable=False)
+    salary_sum_squares = Column(Float, default=0.0, nullable=False)
+    min_amount = Column(Float, nullable=True)
+    max_amount = Column(Float, nullable=True)
+    sketch = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,15 +1,26 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
 from app.db.base import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
+from app.utils.position import normalize_position
 
 class SalaryModel(Base):
     __tablename__ = "salaries"
+    __table_args__ = (
+        # Trigram index serves position_normalized LIKE '%...%' on PostgreSQL
+        Index(
+            "ix_salaries_position_normalized_trgm",
+            "position_normalized",
+            postgresql_using="gin",
+            postgresql_ops={"position_normalized": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     position = Column(String, nullable=False)
+    position_normalized = Column(String, nullable=False, default="")
     salary_amount = Column(Float, nullable=False)
     currency = Column(String, default="USD", nullable=True)
     experience_years = Column(Float, nullable=True)
@@ -18,4 +29,9 @@ class SalaryModel(Base):
     
     # Relationships
     user = relationship("UserModel", back_populates="salaries")
-    company = relationship("CompanyModel", back_populates="salaries")
\ No newline at end of file
+    company = relationship("CompanyModel", back_populates="salaries")
+
+    @validates("position")
+    def _normalize_position(self, key, value):
+        self.position_normalized = normalize_position(value)
+        return value
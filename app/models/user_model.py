@@ -29,6 +29,8 @@ class UserModel(Base):
     google_id = Column(String, unique=True, nullable=True)  # Для OAuth Google
 
     role = Column(String, default=UserRole.USER.value, nullable=False)
-    reviews = relationship("ReviewModel", back_populates="user")
+    # Carried in access tokens as "ver"; bumping it revokes every token issued before
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+    reviews = relationship("ReviewModel", back_populates="user", foreign_keys="ReviewModel.user_id")
     salaries = relationship("SalaryModel", back_populates="user")
     account_settings = relationship("AccountSettings", back_populates="user", uselist=False)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from .user_schema import UserBaseSchema, UserCreateSchema, UserResponseSchema, TokenSchema
-from .company_schema import CompanyBase, CompanyCreate, CompanyUpdate, CompanyResponse
-from .review_schema import ReviewBase, ReviewCreate, ReviewUpdate, ReviewResponse
-from .salary_schema import SalaryBase, SalaryCreate, SalaryUpdate, SalaryResponse
+from .company_schema import CompanyBase, CompanyCreate, CompanyUpdate, CompanyResponse, TopPosition, CompanyDetailResponse, CompanySuggestion
+from .review_schema import ReviewBase, ReviewCreate, ReviewUpdate, ReviewResponse, ModerationDecision, BatchModerationRequest, ModerationOutcome, BatchModerationResult, ClaimedReviews, ReleaseClaimsRequest, ClaimLatency, ModerationQueueStats
+from .salary_schema import SalaryBase, SalaryCreate, SalaryUpdate, SalaryResponse, SalaryBulkError, SalaryBulkResult
 from .account_settings_schema import AccountSettingsBase, AccountSettingsCreate, AccountSettingsUpdate, AccountSettingsResponse
 from .moderation_log_schema import ModerationLogBase, ModerationLogCreate, ModerationLogResponse
\ No newline at end of file
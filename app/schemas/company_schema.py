@@ -30,8 +30,61 @@ class CompanyUpdate(BaseModel):
 class CompanyResponse(CompanyBase):
     id:int
     rating:float
+    review_count:int = 0
     created_at: datetime
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TopPosition(BaseModel):
+    position: str
+    count: int
+    median: float | None = None
+
+class CompanyDetailResponse(CompanyResponse):
+    rating_breakdown: dict[int, int]
+    salary_count: int = 0
+    salary_median: float | None = None
+    top_positions: list[TopPosition] = []
+
+class CompanySuggestion(BaseModel):
+    id: int
+    name: str
+    rating: float
+    industry: str | None = None
+    logo_url: str | None = None
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    id: int
+    name: str
+    industry: str | None = None
+    logo_url: str | None = None
+    score: float
+
+class ReviewAggregates(BaseModel):
+    total: int = 0
+    verified: int = 0
+    pending: int = 0
+    average_rating: float | None = None
+    current_employee_share: float | None = None
+
+class SalaryAggregates(BaseModel):
+    count: int
+    average: float
+    median: float | None = None
+    min: float
+    max: float
+    percentile_25: float | None = None
+    percentile_75: float | None = None
+    stddev: float | None = None
+
+class CompanyComparison(CompanyResponse):
+    rating_breakdown: dict[int, int]
+    reviews: ReviewAggregates
+    salaries: SalaryAggregates | None = None
+
+class CompanyCompareResponse(BaseModel):
+    companies: list[CompanyComparison]
+    missing: list[int] = []
@@ -4,9 +4,10 @@ from typing import Any
 
 class ModerationLogBase(BaseModel):
     review_id: int
-    ai_score: float
+    ai_score: float | None = None
     flagged_words: dict[str, Any] | None = None
     moderator_decision: str
+    moderator_id: int | None = None
     moderated_at: datetime
 
 class ModerationLogCreate(ModerationLogBase):
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime, date
+from typing import Literal
 
 class ReviewBase(BaseModel):
     company_id: int
@@ -37,4 +38,40 @@ class ReviewResponse(ReviewBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ModerationDecision(BaseModel):
+    review_id: int
+    status: Literal["pending", "verified", "rejected"]
+
+class BatchModerationRequest(BaseModel):
+    decisions: list[ModerationDecision] = Field(..., min_length=1, max_length=5000)
+
+class ModerationOutcome(BaseModel):
+    review_id: int
+    outcome: Literal["updated", "unchanged", "not_found"]
+    status: str | None = None
+
+class BatchModerationResult(BaseModel):
+    updated: int
+    results: list[ModerationOutcome]
+
+class ClaimedReviews(BaseModel):
+    claim_expires_at: datetime
+    reviews: list[ReviewResponse]
+
+class ReleaseClaimsRequest(BaseModel):
+    review_ids: list[int] | None = None
+
+class ClaimLatency(BaseModel):
+    samples: int
+    p50: float | None = None
+    p95: float | None = None
+    max: float | None = None
+
+class ModerationQueueStats(BaseModel):
+    depth: int
+    claimed: int
+    available: int
+    oldest_pending_age_seconds: float | None = None
+    claim_latency_ms: ClaimLatency
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Any
 from datetime import datetime
 
 class SalaryBase(BaseModel):
@@ -26,4 +26,13 @@ class SalaryResponse(SalaryBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class SalaryBulkError(BaseModel):
+    index: int
+    errors: list[dict[str, Any]]
+
+class SalaryBulkResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[SalaryBulkError]
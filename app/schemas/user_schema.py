@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from app.models.user_model import UserRole
 
 
 
@@ -21,8 +22,21 @@ class UserResponseSchema(UserBaseSchema):
 
     model_config = {"from_attributes": True}
 
+class UserAccessUpdate(BaseModel):
+    role: UserRole | None = None
+    is_active: bool | None = None
+
+class UserAccessResponse(BaseModel):
+    id: int
+    email: EmailStr
+    role: str
+    is_active: bool
+
+    model_config = {"from_attributes": True}
+
 class TokenSchema(BaseModel):
     access_token: str
+    refresh_token: str | None = None
     token_type: str = "bearer"
 
 
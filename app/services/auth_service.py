@@ -1,14 +1,28 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update
 from app.models.user_model import UserModel, UserRole
 from fastapi import HTTPException, status
 from app.core.security import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
+    create_refresh_token,
     decode_access_token
 )
-from app.core.redis_client import redis_client 
+from app.core.token_revocation import register_refresh_family, rotate_refresh, revoke_family, is_family_revoked
+from app.core.principal_cache import (
+    Principal,
+    principal_cache,
+    load_shared_principal,
+    share_principal,
+    principal_changed,
+    current_token_version
+)
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
 
 
 class AuthService:
@@ -35,7 +49,7 @@ class AuthService:
                     detail="Username already taken"
                 )
         
-        hashed_password = hash_password(password) if password else None
+        hashed_password = await hash_password_async(password) if password else None
         if not username and google_id:
             username = email.split("@")[0]  # Автоматический username для OAuth
         
@@ -55,59 +69,119 @@ class AuthService:
     async def login_user(self,email:str,password:str):
         query = select(UserModel).where(UserModel.email == email)
         user = (await self.db.execute(query)).scalar_one_or_none()
-        if not user or not verify_password(password,user.hashed_password):
+        # Хэширование в отдельном пуле потоков: event loop не блокируется на время pbkdf2
+        matches, new_hash = await verify_password_async(password, user.hashed_password if user else None)
+        if not user or not matches:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
+        if new_hash:
+            # Хэш со старыми параметрами (меньше rounds) - пересохраняем, пока пароль известен
+            user.hashed_password = new_hash
+            await self.db.commit()
         return user
     
+    def _access_token(self,user:UserModel,family:str | None) -> str:
+        if user.is_active is False:
+            # Токены с claims считаются выданными активному пользователю
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User is deactivated"
+            )
+        # role и ver позволяют проверять доступ по одному токену, без запроса к БД;
+        # fam связывает токен с сессией входа, чтобы отзывать их вместе
+        payload = {
+            "sub": str(user.id),"email": user.email,"role": user.role,"ver": user.token_version or 0,
+            "typ": "access","jti": uuid.uuid4().hex
+        }
+        if family:
+            payload["fam"] = family
+        return create_access_token(payload)
+
     async def create_token(self,user:UserModel):
-        payload = {"sub": str(user.id),"email": user.email}
-        access_token = create_access_token(payload)
-        refresh_token = create_access_token(payload)  
-        
-        # Сохраняем refresh токен в Redis (опционально)
+        """Новая сессия входа (семейство токенов): access + refresh.
+
+        Без Redis refresh токен не выдается - его нельзя было бы ни проверить, ни отозвать,
+        а access токен выдается без fam: сессии нет, и проверять ее отзыв не нужно.
+        """
+        family = uuid.uuid4().hex
+        refresh_token,jti = create_refresh_token(user.id,family)
         try:
-            await redis_client.set(f"refresh_token:{user.id}", refresh_token)
+            await register_refresh_family(family,jti)
         except Exception:
-            # Redis не доступен, пропускаем
-            pass
-            
+            logger.warning("refresh token not issued for user %s: Redis unavailable", user.id)
+            family = refresh_token = None
+        access_token = self._access_token(user,family)
         return {
             "access_token": access_token,
             "refresh_token": refresh_token,
         }
-    
-    async def verify_refresh_token(self,user_id:int, refresh_token:str):
+
+    def _refresh_claims(self,refresh_token:str) -> dict:
+        payload = decode_access_token(refresh_token)
+        if payload == "JWT None" or payload.get("typ") != "refresh" or not payload.get("fam") or not payload.get("jti"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+        return payload
+
+    async def rotate_refresh_token(self,refresh_token:str):
+        """Обмен refresh токена на новую пару; старый refresh становится недействительным.
+
+        Повторное предъявление уже использованного refresh токена означает утечку:
+        отзывается вся сессия. Если Redis недоступен - отказ (503), а не пропуск проверки.
+        """
+        payload = self._refresh_claims(refresh_token)
+        family = payload["fam"]
+        user = (await self.db.execute(select(UserModel).where(UserModel.id == int(payload["sub"])))).scalar_one_or_none()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        access_token = self._access_token(user,family)
+        new_refresh_token,new_jti = create_refresh_token(user.id,family)
         try:
-            stored = await redis_client.get(f"refresh_token:{user_id}")
-            if stored != refresh_token:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid refresh token"
-                )
-            return True
+            outcome = await rotate_refresh(family,payload["jti"],new_jti)
+            if outcome == "reused":
+                await revoke_family(family)
         except Exception:
-            # Redis не доступен, пропускаем проверку
-            return True
-
-    async def get_current_user(self, token: str):
-        payload = decode_access_token(token)
-        if payload == "JWT None":
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Token service unavailable"
+            )
+        if outcome == "reused":
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
+                detail="Refresh token reuse detected, sign in again"
             )
-        
-        user_id = payload.get("sub")
-        if not user_id:
+        if outcome == "unknown":
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
+                detail="Refresh token expired or revoked"
             )
-        
-        query = select(UserModel).where(UserModel.id == int(user_id))
+        return {
+            "access_token": access_token,
+            "refresh_token": new_refresh_token,
+        }
+
+    async def logout(self,refresh_token:str):
+        """Завершение сессии: refresh и все access токены этой сессии отзываются"""
+        payload = self._refresh_claims(refresh_token)
+        try:
+            await revoke_family(payload["fam"])
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Token service unavailable"
+            )
+
+    async def get_current_user(self, token: str):
+        # Те же проверки токена (тип, версия, отзыв сессии), затем полная запись пользователя
+        principal = await self.get_current_principal(token)
+        query = select(UserModel).where(UserModel.id == principal.id)
         user = (await self.db.execute(query)).scalar_one_or_none()
         if not user:
             raise HTTPException(
@@ -116,5 +190,113 @@ class AuthService:
             )
         return user
 
+    async def get_current_principal(self, token: str) -> Principal:
+        """Кто делает запрос, для проверок доступа.
 
-    
\ No newline at end of file
+        Токены с claims role/ver проверяются только по самому токену и версии пользователя
+        в памяти: устаревшая версия (сменили роль, заблокировали) - 401, клиент обновляет токен.
+        Повторный запрос с тем же токеном не проверяет даже подпись (in-process кэш).
+        Старые токены без этих claims - через Redis, затем users.
+        """
+        principal = principal_cache.get(token)
+        if principal is None:
+            payload = decode_access_token(token)
+            if payload == "JWT None" or not payload.get("sub"):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token"
+                )
+            if payload.get("typ") == "refresh":
+                # refresh токен годится только для /auth/refresh
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token"
+                )
+            user_id = int(payload["sub"])
+            if "role" in payload and "ver" in payload:
+                # Заблокированным токены не выдаются, а блокировка сдвигает версию
+                principal = Principal(
+                    id=user_id, email=payload.get("email"), role=payload["role"], is_active=True,
+                    token_version=payload["ver"], token_family=payload.get("fam")
+                )
+            else:
+                principal = await self._load_principal(user_id)
+            principal_cache.put(token, principal, payload.get("exp"))
+        if principal.token_version < current_token_version(principal.id):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+        if principal.token_family:
+            # Ответ из локального bloom-фильтра, без Redis; Redis нужен только при попадании в фильтр,
+            # и если он недоступен - отказ
+            try:
+                revoked = await is_family_revoked(principal.token_family)
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Token service unavailable"
+                )
+            if revoked:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token has been revoked"
+                )
+        if not principal.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User is deactivated"
+            )
+        return principal
+
+    async def _load_principal(self, user_id: int) -> Principal:
+        principal = await load_shared_principal(user_id)
+        if principal is not None:
+            return principal
+        query = select(
+            UserModel.id, UserModel.email, UserModel.role, UserModel.is_active, UserModel.token_version
+        ).where(UserModel.id == user_id)
+        row = (await self.db.execute(query)).first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        principal = Principal(
+            id=row.id, email=row.email, role=row.role, is_active=row.is_active is not False, token_version=row.token_version or 0
+        )
+        await share_principal(principal)
+        return principal
+
+    async def update_user_access(self, user_id: int, role: str | None = None, is_active: bool | None = None) -> UserModel:
+        """Смена роли / блокировка.
+
+        Версия токенов пользователя увеличивается одним UPDATE, поэтому все выданные ранее
+        токены перестают приниматься во всех воркерах.
+        """
+        values = {}
+        if role is not None:
+            values["role"] = role
+        if is_active is not None:
+            values["is_active"] = is_active
+        if not values:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nothing to update"
+            )
+        stmt = (
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(**values, token_version=UserModel.token_version + 1)
+            .returning(UserModel)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        user = (await self.db.execute(stmt)).scalar_one_or_none()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        await self.db.commit()
+        await principal_changed(user_id, user.token_version)
+        return user
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import re
+
+from sqlalchemy import select
+
+from app.core.events import event_bus
+from app.db.session import async_session
+from app.models.company_model import CompanyModel
+from app.utils.prefix_index import PrefixIndex
+
+logger = logging.getLogger(__name__)
+
+COMPANY_EVENTS_CHANNEL = "events:companies"
+# Full rebuild interval; picks up rating changes and anything missed over pub/sub
+AUTOCOMPLETE_REFRESH_SECONDS = 600
+
+_separators = re.compile(r"[^\w]+")
+
+company_index = PrefixIndex()
+_refresh_task: asyncio.Task | None = None
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(_separators.sub(" ", text.casefold()).split())
+
+
+def name_keys(name: str) -> list[str]:
+    """Every word-start suffix of the name, so "Beta Bank" is found by "beta b" and by "bank"."""
+    words = normalize_query(name).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def _entry(company_id: int, name: str, rating: float | None, industry: str | None, logo_url: str | None):
+    payload = {"id": company_id, "name": name, "rating": rating or 0.0, "industry": industry, "logo_url": logo_url}
+    return company_id, name_keys(name), rating or 0.0, payload
+
+
+async def load_company_index() -> int:
+    async with async_session() as db:
+        rows = (await db.execute(select(
+            CompanyModel.id, CompanyModel.name, CompanyModel.rating, CompanyModel.industry, CompanyModel.logo_url
+        ))).all()
+    company_index.build(_entry(*row) for row in rows)
+    return len(rows)
+
+
+def search_companies(q: str, limit: int = 10) -> list[dict]:
+    return company_index.search(normalize_query(q), limit)
+
+
+def _apply(payload: dict) -> None:
+    if payload.get("deleted"):
+        company_index.remove(payload["id"])
+    else:
+        company_index.upsert(*_entry(payload["id"], payload["name"], payload["rating"], payload["industry"], payload["logo_url"]))
+
+
+event_bus.subscribe(COMPANY_EVENTS_CHANNEL, _apply)
+
+
+async def company_changed(company: CompanyModel) -> None:
+    """Update this process's index and tell the other workers."""
+    payload = {
+        "id": company.id, "name": company.name, "rating": company.rating,
+        "industry": company.industry, "logo_url": company.logo_url,
+    }
+    _apply(payload)
+    await event_bus.publish(COMPANY_EVENTS_CHANNEL, payload)
+
+
+async def company_deleted(company_id: int) -> None:
+    payload = {"id": company_id, "deleted": True}
+    _apply(payload)
+    await event_bus.publish(COMPANY_EVENTS_CHANNEL, payload)
+
+
+async def _refresh_periodically() -> None:
+    while True:
+        await asyncio.sleep(AUTOCOMPLETE_REFRESH_SECONDS)
+        try:
+            await load_company_index()
+        except Exception:
+            logger.exception("company autocomplete refresh failed, keeping the current index")
+
+
+async def start_autocomplete() -> None:
+    """Initial load plus the periodic refresh. Start the event bus first so no change slips in between."""
+    global _refresh_task
+    try:
+        logger.info("company autocomplete index loaded: %d companies", await load_company_index())
+    except Exception:
+        logger.exception("company autocomplete index could not be loaded, retrying on the next refresh")
+    _refresh_task = asyncio.create_task(_refresh_periodically())
+
+
+async def stop_autocomplete() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+        _refresh_task = None
@@ -0,0 +1,148 @@
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import cache_redis_client, redis_client
+from app.models.company_model import CompanyModel
+from app.models.company_summary_model import CompanySummaryModel
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_METRICS = ("rating", "review_count", "salary_median")
+# Set once a rebuild has finished; without it the boards may be partial and reads go to the database
+LEADERBOARD_READY_KEY = "leaderboard:ready"
+# company id -> industry the company is currently filed under, to move it when its industry changes
+LEADERBOARD_INDUSTRY_KEY = "leaderboard:industry"
+REBUILD_CHUNK_SIZE = 1000
+
+
+def leaderboard_key(metric: str, industry: str | None = None) -> str:
+    return f"leaderboard:{metric}:industry:{industry}" if industry else f"leaderboard:{metric}:all"
+
+
+def _metric_query():
+    return (
+        select(
+            CompanyModel.id,
+            CompanyModel.industry,
+            CompanyModel.rating,
+            CompanyModel.review_count,
+            CompanySummaryModel.salary_median,
+        )
+        .outerjoin(CompanySummaryModel, CompanySummaryModel.company_id == CompanyModel.id)
+    )
+
+
+def metric_scores(row) -> dict[str, float | None]:
+    """Score on each board; None keeps the company off it (no verified reviews, no salaries)."""
+    rated = bool(row.review_count)
+    return {
+        "rating": row.rating if rated else None,
+        "review_count": row.review_count if rated else None,
+        "salary_median": row.salary_median,
+    }
+
+
+def _file(pipe, company_id: int, industry: str | None, old_industry: str | None, scores: dict) -> None:
+    for metric, score in scores.items():
+        keys = [leaderboard_key(metric)] + ([leaderboard_key(metric, industry)] if industry else [])
+        if old_industry and old_industry != industry:
+            pipe.zrem(leaderboard_key(metric, old_industry), company_id)
+        for key in keys:
+            if score is None:
+                pipe.zrem(key, company_id)
+            else:
+                pipe.zadd(key, {company_id: score})
+    if industry:
+        pipe.hset(LEADERBOARD_INDUSTRY_KEY, company_id, industry)
+    else:
+        pipe.hdel(LEADERBOARD_INDUSTRY_KEY, company_id)
+
+
+async def sync_leaderboards(db: AsyncSession, *company_ids: int) -> None:
+    """Re-read these companies' metrics and write them to every board they belong on.
+
+    Called after the write that moved them has committed. Scores are absolute, so a
+    repeated or reordered sync converges; a failed one is repaired by the rebuild command.
+    Deleted companies are taken off all boards.
+    """
+    ids = sorted(set(company_ids))
+    if not ids:
+        return
+    rows = {row.id: row for row in (await db.execute(_metric_query().where(CompanyModel.id.in_(ids)))).all()}
+    try:
+        old_industries = await cache_redis_client.hmget(LEADERBOARD_INDUSTRY_KEY, ids)
+        async with cache_redis_client.pipeline(transaction=True) as pipe:
+            for company_id, old_industry in zip(ids, old_industries):
+                row = rows.get(company_id)
+                if row is None:
+                    _file(pipe, company_id, None, old_industry, dict.fromkeys(LEADERBOARD_METRICS))
+                else:
+                    _file(pipe, company_id, row.industry, old_industry, metric_scores(row))
+            await pipe.execute()
+    except Exception:
+        logger.warning("leaderboard update failed for companies %s", ids)
+
+
+async def leaderboard_range(metric: str, industry: str | None, offset: int, limit: int) -> tuple[list[tuple[int, float]], int] | None:
+    """(company id, score) pairs ranked best first, and the board size.
+
+    None when Redis is unreachable or the boards have not been built yet.
+    """
+    key = leaderboard_key(metric, industry)
+    try:
+        async with cache_redis_client.pipeline(transaction=False) as pipe:
+            pipe.exists(LEADERBOARD_READY_KEY)
+            pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+            pipe.zcard(key)
+            ready, members, total = await pipe.execute()
+    except Exception:
+        logger.warning("leaderboard read failed for %s", key)
+        return None
+    if not ready:
+        return None
+    return [(int(member), score) for member, score in members], total
+
+
+async def _delete_boards() -> None:
+    keys = [key async for key in redis_client.scan_iter(match="leaderboard:*", count=1000)]
+    for start in range(0, len(keys), REBUILD_CHUNK_SIZE):
+        await redis_client.delete(*keys[start:start + REBUILD_CHUNK_SIZE])
+
+
+async def rebuild_leaderboards(db: AsyncSession) -> int:
+    """Drop every board and refill them from the database. Returns the companies filed.
+
+    Reads fall back to the database while this runs. Uses the client without socket
+    timeouts, since large pipelines may legitimately take longer than a cache read.
+    """
+    await redis_client.delete(LEADERBOARD_READY_KEY)
+    await _delete_boards()
+    filed = 0
+    result = await db.stream(_metric_query().order_by(CompanyModel.id).execution_options(yield_per=REBUILD_CHUNK_SIZE))
+    async for batch in result.partitions():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for row in batch:
+                _file(pipe, row.id, row.industry, None, metric_scores(row))
+            await pipe.execute()
+        filed += len(batch)
+    await redis_client.set(LEADERBOARD_READY_KEY, 1)
+    return filed
+
+
+def ranked_fallback_query(metric: str, industry: str | None):
+    """The same ranking straight from the database, for when Redis cannot serve it."""
+    column = {
+        "rating": CompanyModel.rating,
+        "review_count": CompanyModel.review_count,
+        "salary_median": CompanySummaryModel.salary_median,
+    }[metric]
+    query = _metric_query().add_columns(column.label("score"))
+    if metric == "salary_median":
+        query = query.where(CompanySummaryModel.salary_median.is_not(None))
+    else:
+        query = query.where(CompanyModel.review_count > 0)
+    if industry:
+        query = query.where(CompanyModel.industry == industry)
+    return query.order_by(column.desc(), CompanyModel.id.desc())
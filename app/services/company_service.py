@@ -1,7 +1,45 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select,update,case,func,or_,text
 from app.models.company_model import CompanyModel
+from app.models.review_model import ReviewModel,ReviewStatus
+from app.models.company_summary_model import CompanySummaryModel
 from app.schemas.company_schema import CompanyUpdate,CompanyResponse,CompanyCreate
+from app.core.cache import cache_get_json,cache_set_json,cache_delete,cache_version,cache_version_or_none,bump_cache_version
+from app.core.http_cache import purge_surrogate_keys,company_key,COMPANIES_KEY
+from app.db.dialect import dialect_name
+from app.utils.pagination import KeysetPage,keyset_paginate
+from app.services.company_autocomplete import company_changed,company_deleted
+from app.services.salary_aggregate_service import SalaryAggregateService
+from app.services.company_summary_service import RATING_BUCKETS
+from app.services.company_leaderboard import sync_leaderboards,leaderboard_range,ranked_fallback_query
+import json
+
+COMPANY_CACHE_NAMESPACE = "companies"
+COMPANY_CACHE_TTL = 600
+COMPANY_LIST_CACHE_TTL = 60
+COMPANY_COUNT_TTL = 300
+COMPARE_MAX_COMPANIES = 20
+
+# sort -> (order columns, newest/highest first by default); the last column must be unique
+COMPANY_SORTS = {
+    "name": ([CompanyModel.name], False),
+    "rating": ([CompanyModel.rating, CompanyModel.id], True),
+    "created_at": ([CompanyModel.created_at, CompanyModel.id], True),
+}
+
+def company_cache_key(company_id:int) -> str:
+    return f"company:{company_id}"
+
+
+async def invalidate_company_cache(*company_ids:int):
+    """Drop cached payloads of these companies (e.g. after their rating moved) and move
+    listings to a new generation, which also changes their ETags. The CDN copies tagged
+    with the same surrogate keys are purged too.
+    """
+    await cache_delete(*(company_cache_key(company_id) for company_id in company_ids))
+    await bump_cache_version(COMPANY_CACHE_NAMESPACE)
+    purge_surrogate_keys(COMPANIES_KEY,*(company_key(company_id) for company_id in company_ids))
+
 
 class CompanyService:
     def __init__(self,db_session:AsyncSession):
@@ -12,6 +50,9 @@ class CompanyService:
         self.db.add(company)
         await self.db.commit()
         await self.db.refresh(company)
+        await invalidate_company_cache()
+        await sync_leaderboards(self.db,company.id)
+        await company_changed(company)
         return company
     
     async def get_company(self,company_id:int)->CompanyModel:
@@ -19,11 +60,179 @@ class CompanyService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_company_cached(self,company_id:int)->dict | None:
+        """Read-through: serialized CompanyResponse from Redis, else from the database."""
+        key = company_cache_key(company_id)
+        cached = await cache_get_json(key,stats="company")
+        if cached is not None:
+            return cached
+        company = await self.get_company(company_id)
+        if not company:
+            return None
+        payload = CompanyResponse.model_validate(company).model_dump(mode="json")
+        await cache_set_json(key,payload,COMPANY_CACHE_TTL)
+        return payload
+
+    async def listing_version(self) -> int | None:
+        """Generation of the company listings, bumped on every company or rating change.
+
+        None when Redis is unreachable: listings then go out without validators.
+        """
+        return await cache_version_or_none(COMPANY_CACHE_NAMESPACE)
+
     async def get_all_companies(self) -> list[CompanyModel]:
         query = select(CompanyModel)
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    def _filter_companies(self,query,industry:str | None,location:str | None,is_public:bool | None,min_rating:float | None):
+        if industry:
+            query = query.where(CompanyModel.industry == industry)
+        if location:
+            query = query.where(CompanyModel.location == location)
+        if is_public is not None:
+            query = query.where(CompanyModel.is_public == is_public)
+        if min_rating is not None:
+            query = query.where(CompanyModel.rating >= min_rating)
+        return query
+
+    async def list_companies(
+        self,
+        industry: str | None = None,
+        location: str | None = None,
+        is_public: bool | None = None,
+        min_rating: float | None = None,
+        sort: str = "name",
+        order: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> KeysetPage:
+        """One listing page of serialized CompanyResponse items, cached per parameter set."""
+        params = {
+            "industry": industry,"location": location,"is_public": is_public,"min_rating": min_rating,
+            "sort": sort,"order": order,"limit": limit,"cursor": cursor,
+        }
+        version = await cache_version(COMPANY_CACHE_NAMESPACE)
+        key = f"companies:list:v{version}:{json.dumps(params,sort_keys=True)}"
+        cached = await cache_get_json(key,stats="company_list")
+        if cached is not None:
+            return KeysetPage(cached["items"],cached["next"],cached["prev"])
+
+        order_columns,descending = COMPANY_SORTS[sort]
+        if order:
+            descending = order == "desc"
+        query = self._filter_companies(select(CompanyModel),industry,location,is_public,min_rating)
+        page = await keyset_paginate(self.db,query,order_columns,cursor,limit,descending=descending,sort=sort)
+        items = [CompanyResponse.model_validate(company).model_dump(mode="json") for company in page.items]
+        await cache_set_json(key,{"items": items,"next": page.next_cursor,"prev": page.prev_cursor},COMPANY_LIST_CACHE_TTL)
+        return KeysetPage(items,page.next_cursor,page.prev_cursor)
+
+    async def estimate_company_count(
+        self,
+        industry: str | None = None,
+        location: str | None = None,
+        is_public: bool | None = None,
+        min_rating: float | None = None,
+    ) -> int:
+        """Row count for a filter set without COUNT(*) on every call.
+
+        Unfiltered on PostgreSQL this is the planner's reltuples estimate. Otherwise an exact
+        count is cached per filter set for COMPANY_COUNT_TTL seconds, and dropped early when
+        companies change.
+        """
+        filters = {"industry": industry,"location": location,"is_public": is_public,"min_rating": min_rating}
+        unfiltered = all(value is None or value == "" for value in filters.values())
+        if unfiltered and dialect_name(self.db) == "postgresql":
+            estimate = (await self.db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'companies'::regclass")
+            )).scalar()
+            # -1 until the table has been vacuumed/analyzed once
+            if estimate is not None and estimate >= 0:
+                return estimate
+
+        version = await cache_version(COMPANY_CACHE_NAMESPACE)
+        key = f"companies:count:v{version}:{json.dumps(filters,sort_keys=True)}"
+        cached = await cache_get_json(key)
+        if cached is not None:
+            return cached
+        query = self._filter_companies(select(func.count()).select_from(CompanyModel),industry,location,is_public,min_rating)
+        count = (await self.db.execute(query)).scalar_one()
+        await cache_set_json(key,count,COMPANY_COUNT_TTL)
+        return count
+
+    async def get_leaderboard(self,metric:str,industry:str | None = None,offset:int = 0,limit:int = 20) -> tuple[list[dict],int]:
+        """One page of a leaderboard and its size, ranked in Redis; the database stands in when Redis can't."""
+        ranked = await leaderboard_range(metric,industry,offset,limit)
+        if ranked is not None:
+            pairs,total = ranked
+            names = {}
+            if pairs:
+                query = select(CompanyModel.id,CompanyModel.name,CompanyModel.industry,CompanyModel.logo_url).where(
+                    CompanyModel.id.in_([company_id for company_id,_ in pairs])
+                )
+                names = {row.id: row for row in (await self.db.execute(query)).all()}
+            # A company deleted after the board was read is simply skipped
+            entries = [(names[company_id],score) for company_id,score in pairs if company_id in names]
+        else:
+            fallback = ranked_fallback_query(metric,industry)
+            total = (await self.db.execute(select(func.count()).select_from(fallback.order_by(None).subquery()))).scalar_one()
+            rows = (await self.db.execute(
+                fallback.add_columns(CompanyModel.name,CompanyModel.logo_url).offset(offset).limit(limit)
+            )).all()
+            entries = [(row,row.score) for row in rows]
+        return [
+            {"rank": offset + position + 1,"id": row.id,"name": row.name,"industry": row.industry,"logo_url": row.logo_url,"score": score}
+            for position,(row,score) in enumerate(entries)
+        ],total
+
+    async def compare_companies(self,company_ids:list[int]) -> dict:
+        """Company fields, review and salary aggregates for several companies side by side.
+
+        Three queries whatever the number of ids: companies with their summaries, one
+        GROUP BY over reviews and one read of the salary rollup. Results keep the
+        requested order; unknown ids are listed under `missing`.
+        """
+        ids = list(dict.fromkeys(company_ids))
+        rows = (await self.db.execute(
+            select(CompanyModel,CompanySummaryModel)
+            .outerjoin(CompanySummaryModel,CompanySummaryModel.company_id == CompanyModel.id)
+            .where(CompanyModel.id.in_(ids))
+        )).all()
+        found = {company.id: (company,summary) for company,summary in rows}
+
+        verified = ReviewModel.status == ReviewStatus.VERIFIED.value
+        review_query = (
+            select(
+                ReviewModel.company_id,
+                func.count().label("total"),
+                func.count().filter(verified).label("verified"),
+                func.count().filter(ReviewModel.status == ReviewStatus.PENDING.value).label("pending"),
+                func.avg(ReviewModel.rating).filter(verified).label("average_rating"),
+                func.avg(case((ReviewModel.is_current_employee,1.0),else_=0.0)).filter(verified).label("current_employee_share"),
+            )
+            .where(ReviewModel.company_id.in_(list(found)))
+            .group_by(ReviewModel.company_id)
+        )
+        reviews = {row.company_id: row._asdict() for row in (await self.db.execute(review_query))} if found else {}
+        salaries = await SalaryAggregateService(self.db).get_statistics_many(list(found)) if found else {}
+
+        no_reviews = {"total": 0,"verified": 0,"pending": 0,"average_rating": None,"current_employee_share": None}
+        companies = []
+        for company_id in ids:
+            if company_id not in found:
+                continue
+            company,summary = found[company_id]
+            review_stats = reviews.get(company_id,no_reviews)
+            companies.append({
+                **CompanyResponse.model_validate(company).model_dump(),
+                "rating_breakdown": {
+                    bucket: getattr(summary,f"rating_{bucket}") if summary else 0 for bucket in RATING_BUCKETS
+                },
+                "reviews": {key: value for key,value in review_stats.items() if key != "company_id"},
+                "salaries": salaries.get(company_id),
+            })
+        return {"companies": companies,"missing": [company_id for company_id in ids if company_id not in found]}
+
     async def update_company(self,company_id:int,company_data:CompanyUpdate)->CompanyModel:
         company = await self.get_company(company_id)
         if not company:
@@ -32,6 +241,9 @@ class CompanyService:
             setattr(company,field,value)
         await self.db.commit()
         await self.db.refresh(company)
+        await invalidate_company_cache(company_id)
+        await sync_leaderboards(self.db,company_id)
+        await company_changed(company)
         return company
     
     async def delete_company(self,company_id:int)->bool:
@@ -40,6 +252,56 @@ class CompanyService:
             return False
         await self.db.delete(company)
         await self.db.commit()
+        await invalidate_company_cache(company_id)
+        await sync_leaderboards(self.db,company_id)
+        await company_deleted(company_id)
         return True
 
+    async def apply_rating_delta(self,company_id:int,count_delta:int,sum_delta:float):
+        """Atomically adjust the verified review count/sum and recompute the average.
+
+        Runs in the caller's transaction. The increments happen in SQL, so
+        concurrent reviews of the same company never overwrite each other.
+        After committing, callers drop the cached company with invalidate_company_cache.
+        """
+        if not count_delta and not sum_delta:
+            return
+        new_count = CompanyModel.review_count + count_delta
+        new_sum = CompanyModel.rating_sum + sum_delta
+        query = (
+            update(CompanyModel)
+            .where(CompanyModel.id == company_id)
+            .values(
+                review_count=new_count,
+                rating_sum=new_sum,
+                rating=case((new_count > 0,new_sum / new_count),else_=0.0),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(query)
 
+    async def reconcile_ratings(self)->int:
+        """Recompute review_count/rating_sum/rating from verified reviews, touching only drifted rows."""
+        verified = (ReviewModel.company_id == CompanyModel.id) & (ReviewModel.status == ReviewStatus.VERIFIED.value)
+        actual_count = select(func.count(ReviewModel.id)).where(verified).scalar_subquery()
+        actual_sum = select(func.coalesce(func.sum(ReviewModel.rating),0.0)).where(verified).scalar_subquery()
+        query = (
+            update(CompanyModel)
+            .where(or_(
+                CompanyModel.review_count != actual_count,
+                func.abs(CompanyModel.rating_sum - actual_sum) > 1e-6,
+            ))
+            .values(
+                review_count=actual_count,
+                rating_sum=actual_sum,
+                rating=case((actual_count > 0,actual_sum / actual_count),else_=0.0),
+            )
+            .returning(CompanyModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        repaired = (await self.db.execute(query)).scalars().all()
+        await self.db.commit()
+        if repaired:
+            await invalidate_company_cache(*repaired)
+            await sync_leaderboards(self.db,*repaired)
+        return len(repaired)
@@ -0,0 +1,159 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, case, func
+from app.db.dialect import dialect_insert
+from app.models.company_model import CompanyModel
+from app.models.company_summary_model import CompanySummaryModel
+from app.models.review_model import ReviewModel, ReviewStatus
+from app.models.salary_aggregate_model import SalaryAggregateModel
+from app.schemas.company_schema import CompanyResponse
+from app.utils.quantile_sketch import QuantileSketch
+from typing import Iterable, Optional
+
+TOP_POSITIONS = 5
+RATING_BUCKETS = (1, 2, 3, 4, 5)
+
+
+def rating_bucket(rating: float) -> int:
+    """Star bucket of a rating: rounded half up and clamped to 1..5."""
+    return min(5, max(1, int(rating + 0.5)))
+
+
+def _salary_fields(rows: list[SalaryAggregateModel]) -> dict:
+    """Summary salary columns from one company's salary_aggregates rows."""
+    count = sum(row.count for row in rows)
+    if not count:
+        return {"salary_count": 0, "salary_median": None, "top_positions": []}
+
+    def median(group: list[SalaryAggregateModel]) -> Optional[float]:
+        sketch = QuantileSketch()
+        for row in group:
+            sketch.merge(QuantileSketch.from_dict(row.sketch))
+        value = sketch.quantile(0.5)
+        if value is None:
+            return None
+        return min(max(value, min(row.min_amount for row in group)), max(row.max_amount for row in group))
+
+    top = sorted(rows, key=lambda row: (-row.count, row.position_key))[:TOP_POSITIONS]
+    return {
+        "salary_count": count,
+        "salary_median": median(rows),
+        "top_positions": [
+            {"position": row.position_key, "count": row.count, "median": median([row])}
+            for row in top
+        ],
+    }
+
+
+class CompanySummaryService:
+    """Maintains `company_summaries`, the precomputed part of the company detail page.
+
+    Review and salary writes call in here inside their own transaction; nothing here
+    commits except `rebuild`.
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def apply_review_delta(self, company_id: int, added: Iterable[float] = (), removed: Iterable[float] = ()) -> None:
+        """Move verified reviews with these ratings into/out of the star breakdown."""
+        deltas: dict[int, int] = {}
+        for rating in added:
+            deltas[rating_bucket(rating)] = deltas.get(rating_bucket(rating), 0) + 1
+        for rating in removed:
+            deltas[rating_bucket(rating)] = deltas.get(rating_bucket(rating), 0) - 1
+        deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        # One upsert: creates the row on first use, otherwise increments in SQL
+        stmt = dialect_insert(self.db, CompanySummaryModel).values(
+            company_id=company_id,
+            **{f"rating_{bucket}": max(delta, 0) for bucket, delta in deltas.items()},
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["company_id"],
+            set_={
+                f"rating_{bucket}": getattr(CompanySummaryModel, f"rating_{bucket}") + delta
+                for bucket, delta in deltas.items()
+            },
+        )
+        await self.db.execute(stmt)
+
+    async def refresh_salaries(self, *company_ids: int) -> None:
+        """Recompute the salary columns of these companies from their salary_aggregates rows."""
+        for company_id in sorted(set(company_ids)):
+            # Lock the summary row so concurrent refreshes of one company apply in order
+            await self.db.execute(
+                dialect_insert(self.db, CompanySummaryModel)
+                .values(company_id=company_id)
+                .on_conflict_do_nothing(index_elements=["company_id"])
+            )
+            await self.db.execute(
+                select(CompanySummaryModel.company_id)
+                .where(CompanySummaryModel.company_id == company_id)
+                .with_for_update()
+            )
+            rows = (await self.db.execute(
+                select(SalaryAggregateModel).where(SalaryAggregateModel.company_id == company_id)
+            )).scalars().all()
+            await self.db.execute(
+                update(CompanySummaryModel)
+                .where(CompanySummaryModel.company_id == company_id)
+                .values(**_salary_fields(rows))
+                .execution_options(synchronize_session=False)
+            )
+
+    async def get_detail(self, company_id: int) -> Optional[dict]:
+        """Company plus its summary in one query, shaped like CompanyDetailResponse."""
+        query = (
+            select(CompanyModel, CompanySummaryModel)
+            .outerjoin(CompanySummaryModel, CompanySummaryModel.company_id == CompanyModel.id)
+            .where(CompanyModel.id == company_id)
+        )
+        row = (await self.db.execute(query)).first()
+        if row is None:
+            return None
+        company, summary = row
+        return {
+            **CompanyResponse.model_validate(company).model_dump(),
+            "rating_breakdown": {
+                bucket: getattr(summary, f"rating_{bucket}") if summary else 0 for bucket in RATING_BUCKETS
+            },
+            "salary_count": summary.salary_count if summary else 0,
+            "salary_median": summary.salary_median if summary else None,
+            "top_positions": (summary.top_positions or []) if summary else [],
+        }
+
+    async def rebuild(self) -> int:
+        """Recompute every summary from reviews and salary_aggregates. Returns the rows written."""
+        await self.db.execute(delete(CompanySummaryModel))
+        bucket = case(
+            (ReviewModel.rating < 1.5, 1),
+            (ReviewModel.rating < 2.5, 2),
+            (ReviewModel.rating < 3.5, 3),
+            (ReviewModel.rating < 4.5, 4),
+            else_=5,
+        )
+        review_query = (
+            select(
+                ReviewModel.company_id,
+                *(func.sum(case((bucket == b, 1), else_=0)).label(f"rating_{b}") for b in RATING_BUCKETS),
+            )
+            .where(ReviewModel.status == ReviewStatus.VERIFIED.value)
+            .group_by(ReviewModel.company_id)
+        )
+        summaries: dict[int, dict] = {}
+        for row in (await self.db.execute(review_query)).mappings():
+            summaries[row["company_id"]] = {f"rating_{b}": row[f"rating_{b}"] for b in RATING_BUCKETS}
+
+        aggregates: dict[int, list[SalaryAggregateModel]] = {}
+        for row in (await self.db.execute(select(SalaryAggregateModel))).scalars():
+            aggregates.setdefault(row.company_id, []).append(row)
+        for company_id, rows in aggregates.items():
+            summaries.setdefault(company_id, {}).update(_salary_fields(rows))
+
+        empty = {**{f"rating_{b}": 0 for b in RATING_BUCKETS}, **_salary_fields([])}
+        values = [{"company_id": company_id, **empty, **fields} for company_id, fields in summaries.items()]
+        if values:
+            await self.db.execute(insert(CompanySummaryModel), values)
+        await self.db.commit()
+        return len(values)
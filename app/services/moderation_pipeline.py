@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+
+from redis.exceptions import ResponseError
+from sqlalchemy import select, insert
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.db.session import async_session
+from app.models.moderation_log_model import ModerationLog
+from app.models.review_model import ReviewModel
+from app.utils.aho_corasick import AhoCorasick
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICON_PATH = Path(__file__).resolve().parent.parent / "data" / "flagged_words.txt"
+LEXICON_CHECK_INTERVAL = 30  # seconds between lexicon mtime checks
+
+STREAM_KEY = "moderation:reviews"
+STREAM_GROUP = "moderation"
+STREAM_MAXLEN = 100000
+STREAM_CLAIM_IDLE_MS = 60000  # entries left unacked this long by a dead consumer get re-claimed
+STREAM_BLOCK_MS = 1000
+
+DECISION_FLAGGED = "auto:flagged"
+DECISION_CLEAN = "auto:clean"
+
+
+class Lexicon:
+    """Weighted flagged-word list compiled into one automaton.
+
+    File format: one `phrase` or `phrase:weight` per line, `#` starts a comment. The file's
+    mtime is checked at most every LEXICON_CHECK_INTERVAL seconds and the automaton is
+    rebuilt when it changes, so edits apply without a restart.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._compiled: tuple[dict[str, float], AhoCorasick] = ({}, AhoCorasick(()))
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+
+    def load(self) -> None:
+        mtime = self.path.stat().st_mtime
+        weights: dict[str, float] = {}
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            phrase, sep, weight = line.rpartition(":")
+            if not sep:
+                # Bare phrase; rpartition leaves it in `weight`
+                phrase, weight = line, "1"
+            try:
+                weights[phrase.strip().lower()] = float(weight)
+            except ValueError:
+                # The colon belongs to the phrase itself
+                weights[line.lower()] = 1.0
+        # Build first, then swap, so concurrent scoring never sees a half-built matcher
+        self._compiled = (weights, AhoCorasick(weights))
+        self._mtime = mtime
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < LEXICON_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            if force or self.path.stat().st_mtime != self._mtime:
+                self.load()
+                logger.info("moderation lexicon loaded: %d phrases from %s", len(self._compiled[0]), self.path)
+        except OSError:
+            logger.exception("moderation lexicon %s could not be loaded, keeping the previous one", self.path)
+
+    def score(self, text: str) -> tuple[float, dict[str, int]]:
+        """Return (score in [0, 1), phrase -> hit count). More and heavier hits push the score up."""
+        self.refresh()
+        weights, matcher = self._compiled
+        hits = matcher.count(text)
+        total = sum(weights.get(phrase, 1.0) * count for phrase, count in hits.items())
+        return 1.0 - math.exp(-total), hits
+
+
+class ModerationPipeline:
+    """Scores new reviews in the background and writes `moderation_logs` rows in batches.
+
+    `enqueue` never blocks the request: ids go into a bounded in-process queue. Without a
+    Redis stream the workers drain that queue directly. With MODERATION_REDIS_STREAM the
+    queue is forwarded to a Redis stream and workers read it through a consumer group, so
+    ids survive a restart and any app instance can score them.
+    """
+
+    def __init__(self, lexicon: Lexicon, workers: int, queue_size: int, batch_size: int, use_stream: bool = False):
+        self.lexicon = lexicon
+        self.workers = workers
+        self.batch_size = batch_size
+        self.use_stream = use_stream
+        self.queue: asyncio.Queue[int] = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list[asyncio.Task] = []
+
+    def enqueue(self, review_id: int) -> bool:
+        try:
+            self.queue.put_nowait(review_id)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("moderation queue full, review %s not scored", review_id)
+            return False
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self.lexicon.refresh(force=True)
+        use_stream = self.use_stream and await self._ensure_group()
+        if use_stream:
+            consumer = f"{socket.gethostname()}-{os.getpid()}"
+            self._tasks.append(asyncio.create_task(self._forwarder()))
+            for i in range(self.workers):
+                self._tasks.append(asyncio.create_task(self._stream_worker(f"{consumer}-{i}")))
+        else:
+            for _ in range(self.workers):
+                self._tasks.append(asyncio.create_task(self._local_worker()))
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        if not self._tasks:
+            return
+        # Let already queued ids finish, but never hold up shutdown for long
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("moderation queue not drained on shutdown, %d ids dropped", self.queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _next_batch(self) -> list[int]:
+        ids = [await self.queue.get()]
+        while len(ids) < self.batch_size and not self.queue.empty():
+            ids.append(self.queue.get_nowait())
+        return ids
+
+    async def _local_worker(self) -> None:
+        while True:
+            ids = await self._next_batch()
+            try:
+                await self.process(ids)
+            except Exception:
+                logger.exception("moderation batch failed for reviews %s", ids)
+            finally:
+                for _ in ids:
+                    self.queue.task_done()
+
+    async def _ensure_group(self) -> bool:
+        try:
+            await redis_client.xgroup_create(STREAM_KEY, STREAM_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                logger.warning("moderation stream unavailable (%s), using the in-process queue", e)
+                return False
+        except Exception as e:
+            logger.warning("moderation stream unavailable (%s), using the in-process queue", e)
+            return False
+        return True
+
+    async def _forwarder(self) -> None:
+        while True:
+            ids = await self._next_batch()
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                for review_id in ids:
+                    pipe.xadd(STREAM_KEY, {"review_id": review_id}, maxlen=STREAM_MAXLEN, approximate=True)
+                await pipe.execute()
+            except Exception:
+                # Redis is down: score here rather than lose the ids
+                logger.warning("moderation stream write failed, scoring %d reviews locally", len(ids))
+                try:
+                    await self.process(ids)
+                except Exception:
+                    logger.exception("moderation batch failed for reviews %s", ids)
+            finally:
+                for _ in ids:
+                    self.queue.task_done()
+
+    async def _read_stream(self, consumer: str) -> list[tuple[str, dict]]:
+        # Take over entries a crashed consumer never acked before reading new ones
+        _, entries, *_ = await redis_client.xautoclaim(
+            STREAM_KEY, STREAM_GROUP, consumer, STREAM_CLAIM_IDLE_MS, start_id="0-0", count=self.batch_size
+        )
+        if entries:
+            return entries
+        response = await redis_client.xreadgroup(
+            STREAM_GROUP, consumer, {STREAM_KEY: ">"}, count=self.batch_size, block=STREAM_BLOCK_MS
+        )
+        return response[0][1] if response else []
+
+    async def _stream_worker(self, consumer: str) -> None:
+        while True:
+            try:
+                entries = [(entry_id, fields) for entry_id, fields in await self._read_stream(consumer) if fields]
+            except Exception:
+                logger.exception("moderation stream read failed")
+                await asyncio.sleep(1)
+                continue
+            if not entries:
+                continue
+            try:
+                await self.process([int(fields["review_id"]) for _, fields in entries])
+            except Exception:
+                # Left pending in the group, re-claimed after STREAM_CLAIM_IDLE_MS
+                logger.exception("moderation batch failed for stream entries %s", [entry_id for entry_id, _ in entries])
+                continue
+            try:
+                await redis_client.xack(STREAM_KEY, STREAM_GROUP, *[entry_id for entry_id, _ in entries])
+            except Exception:
+                logger.exception("moderation stream ack failed")
+
+    async def process(self, review_ids: list[int]) -> int:
+        """Score the given reviews and bulk-insert their logs. Returns the number of logs written.
+
+        Reviews that already have an automatic decision are skipped, so redelivered ids are harmless.
+        """
+        async with async_session() as db:
+            scored = select(ModerationLog.review_id).where(
+                ModerationLog.review_id.in_(review_ids),
+                ModerationLog.moderator_decision.in_((DECISION_FLAGGED, DECISION_CLEAN)),
+            )
+            query = select(
+                ReviewModel.id, ReviewModel.title, ReviewModel.content, ReviewModel.pros, ReviewModel.cons
+            ).where(ReviewModel.id.in_(review_ids), ReviewModel.id.not_in(scored))
+            rows = (await db.execute(query)).all()
+            if not rows:
+                return 0
+
+            logs = []
+            moderated_at = datetime.utcnow()
+            for row in rows:
+                text = "\n".join(part for part in (row.title, row.content, row.pros, row.cons) if part)
+                score, hits = self.lexicon.score(text)
+                logs.append({
+                    "review_id": row.id,
+                    "ai_score": score,
+                    "flagged_words": hits or None,
+                    "moderator_decision": DECISION_FLAGGED if score >= settings.MODERATION_FLAG_THRESHOLD else DECISION_CLEAN,
+                    "moderator_id": None,
+                    "moderated_at": moderated_at,
+                })
+                # Matching is pure Python; yield between reviews so request handlers keep running
+                await asyncio.sleep(0)
+            await db.execute(insert(ModerationLog), logs)
+            await db.commit()
+            return len(logs)
+
+
+moderation_pipeline = ModerationPipeline(
+    Lexicon(settings.MODERATION_LEXICON_PATH or DEFAULT_LEXICON_PATH),
+    workers=settings.MODERATION_WORKERS,
+    queue_size=settings.MODERATION_QUEUE_SIZE,
+    batch_size=settings.MODERATION_BATCH_SIZE,
+    use_stream=settings.MODERATION_REDIS_STREAM,
+)
@@ -0,0 +1,105 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, or_, and_
+from app.models.review_model import ReviewModel, ReviewStatus
+from collections import deque
+from datetime import datetime, timedelta
+import time
+
+DEFAULT_LEASE_SECONDS = 900
+MAX_CLAIM_BATCH = 100
+
+# Durations of recent claim statements in this process, for the stats endpoint
+_claim_latencies: deque[float] = deque(maxlen=1000)
+
+
+class ModerationQueueService:
+    """Work queue over pending reviews.
+
+    A moderator claims a batch by stamping `claimed_by`/`claim_expires_at` on rows picked
+    with FOR UPDATE SKIP LOCKED, so parallel claims never return the same review and never
+    wait on each other. A lease that runs out puts the review back in the queue.
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    def _available(self, moderator_id: int, now: datetime):
+        # Unclaimed, lease expired, or already ours (claiming again renews the lease)
+        return and_(
+            ReviewModel.status == ReviewStatus.PENDING.value,
+            or_(
+                ReviewModel.claim_expires_at.is_(None),
+                ReviewModel.claim_expires_at < now,
+                ReviewModel.claimed_by == moderator_id,
+            ),
+        )
+
+    async def claim(self, moderator_id: int, limit: int = 20, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> tuple[list[ReviewModel], datetime]:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=lease_seconds)
+        candidates = (
+            select(ReviewModel.id)
+            .where(self._available(moderator_id, now))
+            .order_by(ReviewModel.created_at, ReviewModel.id)
+            .limit(min(limit, MAX_CLAIM_BATCH))
+            .with_for_update(skip_locked=True)
+        )
+        # The outer predicate is repeated so a row changed between pick and update is skipped
+        stmt = (
+            update(ReviewModel)
+            .where(ReviewModel.id.in_(candidates.scalar_subquery()), self._available(moderator_id, now))
+            # A lease is not an edit: keep updated_at, and with it the review's ETag
+            .values(claimed_by=moderator_id, claim_expires_at=expires_at, updated_at=ReviewModel.updated_at)
+            .returning(ReviewModel)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        started = time.perf_counter()
+        reviews = list((await self.db.scalars(stmt)).all())
+        await self.db.commit()
+        _claim_latencies.append(time.perf_counter() - started)
+        reviews.sort(key=lambda review: (review.created_at, review.id))
+        return reviews, expires_at
+
+    async def release(self, moderator_id: int, review_ids: list[int] | None = None) -> int:
+        """Hand claimed reviews back to the queue. Without ids, releases all of the moderator's claims."""
+        stmt = (
+            update(ReviewModel)
+            .where(ReviewModel.claimed_by == moderator_id)
+            .values(claimed_by=None, claim_expires_at=None, updated_at=ReviewModel.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        if review_ids:
+            stmt = stmt.where(ReviewModel.id.in_(review_ids))
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        return result.rowcount
+
+    async def stats(self) -> dict:
+        now = datetime.utcnow()
+        active_claim = and_(ReviewModel.claim_expires_at.is_not(None), ReviewModel.claim_expires_at >= now)
+        query = select(
+            func.count(),
+            func.count().filter(active_claim),
+            func.min(ReviewModel.created_at),
+        ).where(ReviewModel.status == ReviewStatus.PENDING.value)
+        depth, claimed, oldest = (await self.db.execute(query)).one()
+
+        latencies = sorted(_claim_latencies)
+
+        def percentile(q: float):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+
+        return {
+            "depth": depth,
+            "claimed": claimed,
+            "available": depth - claimed,
+            "oldest_pending_age_seconds": (now - oldest).total_seconds() if oldest else None,
+            "claim_latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": percentile(1.0),
+            },
+        }
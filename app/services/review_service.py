@@ -1,17 +1,58 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select,update
+from sqlalchemy import select,update,delete,insert,case,func,text,literal_column,table,column
 from app.models.review_model import ReviewModel,ReviewStatus
+from app.models.moderation_log_model import ModerationLog
 from app.models.company_model import CompanyModel
 from app.schemas.review_schema import ReviewCreate,ReviewResponse,ReviewUpdate
+from app.services.company_service import CompanyService,invalidate_company_cache
+from app.services.company_summary_service import CompanySummaryService
+from app.services.company_leaderboard import sync_leaderboards
+from app.services.moderation_pipeline import moderation_pipeline
+from app.core.cache import cache_version_or_none,bump_cache_version
+from app.core.http_cache import purge_surrogate_keys,review_key,company_reviews_key
+from app.db.dialect import dialect_name,update_returning_previous
+from app.utils.pagination import KeysetPage,keyset_paginate
 from typing import List,Optional
 from fastapi import HTTPException
+from datetime import datetime
+
+REVIEW_EXPORT_COLUMNS = [
+    "id", "company_id", "user_id", "rating", "title", "content", "pros", "cons",
+    "is_current_employee", "employment_end_date", "is_anonymous", "recommendations",
+    "work_location", "status", "created_at", "updated_at",
+]
+
+# PostgreSQL keeps reviews.search_vector as a generated column (see migration);
+# SQLite mirrors the text into an FTS5 table that the service maintains itself
+SEARCH_TEXT_CONFIG = "simple"
+reviews_fts = table("reviews_fts", column("rowid"), column("title"), column("content"), column("pros"), column("cons"))
+# URLs of the SQLite databases whose reviews_fts this process has set up and committed
+_fts_ready: set[str] = set()
+
+
+def company_reviews_namespace(company_id: int) -> str:
+    # Generation of one company's review lists; their ETags are derived from it
+    return f"reviews:company:{company_id}"
+
+
+def _fts_query(q: str) -> str:
+    # Quote every term so user input is never parsed as FTS5 syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
 
 class ReviewService:
     def __init__(self,db_session:AsyncSession):
         self.db = db_session
+        self.companies = CompanyService(db_session)
+        self.summaries = CompanySummaryService(db_session)
+        # Companies whose rating moved in the current transaction
+        self._rated_companies: set[int] = set()
+        # Reviews written in the current transaction, with their companies
+        self._touched_reviews: dict[int, int] = {}
     
 
     async def create_review(self,review_data:ReviewCreate,user_id: int) -> ReviewModel:
+        await self._ensure_fts()
         # Check if company exists
         company_query = select(CompanyModel).where(CompanyModel.id == review_data.company_id)
         company_result = await self.db.execute(company_query)
@@ -25,75 +66,302 @@ class ReviewService:
             status = ReviewStatus.PENDING.value
             )
         self.db.add(review)
-        await self.db.commit()
+        await self.db.flush()
+        await self._index_review(review)
+        self._touched_reviews[review.id] = review.company_id
+        await self._commit()
         await self.db.refresh(review)
+        # Scored in the background, the request does not wait for it
+        moderation_pipeline.enqueue(review.id)
         return review
     
-    async def get_review(self,review_id:int)->ReviewModel:
+    async def _ensure_fts(self):
+        """Create reviews_fts and index every review missing from it, once per database.
+
+        Runs in its own committed transaction: request sessions that only read never
+        commit, and setup done in them would roll back. Must run before the caller's
+        session writes, since SQLite lets only one connection write at a time.
+        """
+        if dialect_name(self.db) != "sqlite":
+            return
+        url = str(self.db.bind.url)
+        if url in _fts_ready:
+            return
+        async with self.db.bind.begin() as conn:
+            await conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(title, content, pros, cons)"))
+            # Also repairs an index left incomplete by a setup that never committed
+            await conn.execute(text(
+                "INSERT INTO reviews_fts(rowid, title, content, pros, cons) "
+                "SELECT id, title, content, coalesce(pros, ''), coalesce(cons, '') FROM reviews "
+                "WHERE id NOT IN (SELECT rowid FROM reviews_fts)"
+            ))
+        _fts_ready.add(url)
+
+    async def _index_review(self, review: ReviewModel):
+        # Joins the caller's transaction; _ensure_fts ran before it wrote anything
+        if dialect_name(self.db) != "sqlite":
+            return
+        await self._unindex_review(review.id)
+        await self.db.execute(reviews_fts.insert().values(
+            rowid=review.id, title=review.title, content=review.content,
+            pros=review.pros or "", cons=review.cons or "",
+        ))
+
+    async def _unindex_review(self, review_id: int):
+        if dialect_name(self.db) != "sqlite":
+            return
+        await self.db.execute(reviews_fts.delete().where(reviews_fts.c.rowid == review_id))
+
+    async def search_reviews(self, q: str, company_id: int | None = None, status: str | None = None, limit: int = 10, cursor: str | None = None) -> KeysetPage:
+        """Full-text search over title/content/pros/cons, best match first."""
+        if not q.split():
+            # No terms to match; FTS5 rejects an empty MATCH expression
+            return KeysetPage([], None, None)
+        if dialect_name(self.db) == "postgresql":
+            config = literal_column(f"'{SEARCH_TEXT_CONFIG}'::regconfig")
+            tsquery = func.websearch_to_tsquery(config, q)
+            vector = literal_column("reviews.search_vector")
+            rank = func.ts_rank_cd(vector, tsquery)
+            query = select(ReviewModel, rank.label("rank")).where(vector.op("@@")(tsquery))
+        else:
+            await self._ensure_fts()
+            rank = -func.bm25(literal_column("reviews_fts"))
+            query = (
+                select(ReviewModel, rank.label("rank"))
+                .join(reviews_fts, reviews_fts.c.rowid == ReviewModel.id)
+                .where(literal_column("reviews_fts").op("MATCH")(_fts_query(q)))
+            )
+        if company_id:
+            query = query.where(ReviewModel.company_id == company_id)
+        if status:
+            query = query.where(ReviewModel.status == status)
+        page = await keyset_paginate(
+            self.db, query, [rank, ReviewModel.id], cursor, limit,
+            scalars=False, key_of=lambda row: [row.rank, row.ReviewModel.id], sort="relevance",
+        )
+        return KeysetPage([row.ReviewModel for row in page.items], page.next_cursor, page.prev_cursor)
+    
+    async def get_review(self,review_id:int,for_update:bool = False)->ReviewModel:
         query = select(ReviewModel).where(ReviewModel.id == review_id)
+        if for_update:
+            # Lock the row so status/rating changes and the company counters stay consistent
+            query = query.with_for_update()
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
+
+    async def get_review_updated_at(self, review_id: int) -> datetime | None:
+        """Validator for conditional GETs; reads one column instead of the whole row."""
+        return (await self.db.execute(
+            select(ReviewModel.updated_at).where(ReviewModel.id == review_id)
+        )).scalar_one_or_none()
+
+    async def company_reviews_version(self, company_id: int) -> int | None:
+        """Generation of the company's review lists; None when Redis cannot say."""
+        return await cache_version_or_none(company_reviews_namespace(company_id))
     
-    async def get_reviews_by_company(self, company_id: int, skip: int = 0, limit: int = 10) -> List[ReviewModel]:
+    async def get_reviews_by_company(self, company_id: int, skip: int = 0, limit: int = 10, cursor: str | None = None, status: str | None = None) -> KeysetPage:
         query = select(ReviewModel).where(ReviewModel.company_id == company_id)
-        query = query.offset(skip).limit(limit)
-        result = await self.db.execute(query)
-        return result.scalars().all()
+        if status:
+            query = query.where(ReviewModel.status == status)
+        return await self._page(query, skip, limit, cursor)
     
+    async def _page(self, query, skip: int, limit: int, cursor: str | None) -> KeysetPage:
+        # Newest first, keyset on (created_at, id); skip is kept for old clients only
+        order_columns = [ReviewModel.created_at, ReviewModel.id]
+        if skip and not cursor:
+            query = query.order_by(*[column.desc() for column in order_columns]).offset(skip).limit(limit)
+            items = (await self.db.execute(query)).scalars().all()
+            return KeysetPage(list(items), None, None)
+        return await keyset_paginate(self.db, query, order_columns, cursor, limit, sort="created_at")
+    
+    async def export_batches(self,company_id: int | None = None,batch_size: int = 2000):
+        """Yield review rows (tuples in REVIEW_EXPORT_COLUMNS order) from a server-side cursor."""
+        query = select(*[getattr(ReviewModel,column) for column in REVIEW_EXPORT_COLUMNS]).order_by(ReviewModel.id)
+        if company_id:
+            query = query.where(ReviewModel.company_id == company_id)
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            yield batch
+    
+    async def _verified_changed(self,company_id:int,added:list[float] = (),removed:list[float] = ()):
+        # Verified ratings feed both the company average and the detail page's star breakdown
+        await self.companies.apply_rating_delta(company_id,len(added) - len(removed),sum(added) - sum(removed))
+        await self.summaries.apply_review_delta(company_id,added,removed)
+        self._rated_companies.add(company_id)
+
+    async def _commit(self):
+        await self.db.commit()
+        if self._rated_companies:
+            await invalidate_company_cache(*self._rated_companies)
+            await sync_leaderboards(self.db,*self._rated_companies)
+            self._rated_companies.clear()
+        if self._touched_reviews:
+            companies = set(self._touched_reviews.values())
+            await bump_cache_version(*(company_reviews_namespace(company_id) for company_id in companies))
+            purge_surrogate_keys(
+                *(review_key(review_id) for review_id in self._touched_reviews),
+                *(company_reviews_key(company_id) for company_id in companies),
+            )
+            self._touched_reviews.clear()
+
+    def _can_modify(self,user):
+        # Owner or admin; folded into the UPDATE/DELETE itself so a mutation is one statement
+        if user.role == 'admin':
+            return ()
+        return (ReviewModel.user_id == user.id,)
+
     async def update_review(self,review_id:int,review_data:ReviewUpdate,user)->ReviewModel:
-        review = await self.get_review(review_id)
+        await self._ensure_fts()
+        values = review_data.model_dump(exclude_unset=True)
+        values["updated_at"] = datetime.utcnow()
+        criteria = self._can_modify(user)
+        if "rating" in values:
+            # The old rating is needed to move the company's counters
+            result = await update_returning_previous(self.db,ReviewModel,review_id,criteria,values,["rating"])
+            review,previous = result if result else (None,None)
+        else:
+            stmt = (
+                update(ReviewModel)
+                .where(ReviewModel.id == review_id,*criteria)
+                .values(**values)
+                .returning(ReviewModel)
+                .execution_options(synchronize_session=False,populate_existing=True)
+            )
+            review,previous = (await self.db.execute(stmt)).scalar_one_or_none(),None
         if not review:
+            # Missing and not allowed look the same to the caller
             raise HTTPException(status_code=404, detail="Review not found")
-        # Allow update for owner, admin, or company owner
-        if user.role == 'admin':
-            pass
-        elif review.user_id == user.id:
-            pass
-        else:
-            company_query = select(CompanyModel).where(CompanyModel.id == review.company_id)
-            company_result = await self.db.execute(company_query)
-            company = company_result.scalar_one_or_none()
-            if not company or company.user_id != user.id:
-                raise HTTPException(status_code=404, detail="Review not found")
-        for field,value in review_data.model_dump(exclude_unset=True).items():
-            setattr(review,field,value)
-        
-        await self.db.commit()
-        await self.db.refresh(review)
+        if previous and review.status == ReviewStatus.VERIFIED.value and review.rating != previous["rating"]:
+            await self._verified_changed(review.company_id,added=[review.rating],removed=[previous["rating"]])
+        await self._index_review(review)
+        self._touched_reviews[review.id] = review.company_id
+        await self._commit()
         return review
     
     async def delete_review(self,review_id:int,user)->bool:
-        review = await self.get_review(review_id)
-        if not review:
+        await self._ensure_fts()
+        stmt = (
+            delete(ReviewModel)
+            .where(ReviewModel.id == review_id,*self._can_modify(user))
+            .returning(ReviewModel.company_id,ReviewModel.rating,ReviewModel.status)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = (await self.db.execute(stmt)).first()
+        if not deleted:
             return False
-        # Allow delete for owner, admin, or company owner
-        if user.role == 'admin':
-            pass
-        elif review.user_id == user.id:
-            pass
-        else:
-            company_query = select(CompanyModel).where(CompanyModel.id == review.company_id)
-            company_result = await self.db.execute(company_query)
-            company = company_result.scalar_one_or_none()
-            if not company or company.user_id != user.id:
-                return False
-        await self.db.delete(review)
-        await self.db.commit()
+        if deleted.status == ReviewStatus.VERIFIED.value:
+            await self._verified_changed(deleted.company_id,removed=[deleted.rating])
+        await self._unindex_review(review_id)
+        self._touched_reviews[review_id] = deleted.company_id
+        await self._commit()
         return True
         
-    async def moderate_review(self,review_id: int,status: ReviewStatus) ->ReviewModel:
-        review = await self.get_review(review_id)
+    async def moderate_review(self,review_id: int,status: ReviewStatus,moderator_id: int | None = None) ->ReviewModel:
+        review = await self.get_review(review_id,for_update=True)
         if not review:
             raise HTTPException(status_code=404, detail="Review not found")
+        if review.status != status.value:
+            # Same audit row as the batch path writes for a changed status
+            self.db.add(ModerationLog(
+                review_id=review.id,
+                ai_score=None,
+                flagged_words=None,
+                moderator_decision=status.value,
+                moderator_id=moderator_id,
+                moderated_at=datetime.utcnow(),
+            ))
+        was_verified = review.status == ReviewStatus.VERIFIED.value
+        is_verified = status == ReviewStatus.VERIFIED
+        if was_verified != is_verified:
+            if is_verified:
+                await self._verified_changed(review.company_id,added=[review.rating])
+            else:
+                await self._verified_changed(review.company_id,removed=[review.rating])
         review.status = status.value
-        await self.db.commit()
+        review.claimed_by = None
+        review.claim_expires_at = None
+        self._touched_reviews[review.id] = review.company_id
+        await self._commit()
         await self.db.refresh(review)
         return review
+
+    async def moderate_reviews(self, decisions: list[tuple[int, str]], moderator_id: int | None = None) -> dict:
+        """Apply many (review_id, status) decisions in a single transaction.
+
+        Only rows whose status actually changes are written: one locking SELECT for the
+        previous state, one UPDATE ... RETURNING for the reviews, one bulk INSERT for their
+        moderation logs and one rating update per affected company. The last decision
+        wins when an id is repeated.
+        """
+        wanted = dict(decisions)
+        ids = sorted(wanted)
+        previous = (await self.db.execute(
+            select(ReviewModel.id, ReviewModel.status)
+            .where(ReviewModel.id.in_(ids))
+            .order_by(ReviewModel.id)
+            .with_for_update()
+        )).all()
+        old_status = {row.id: row.status for row in previous}
+        to_change = {review_id: wanted[review_id] for review_id, status in old_status.items() if status != wanted[review_id]}
+
+        changed = []
+        if to_change:
+            stmt = (
+                update(ReviewModel)
+                .where(ReviewModel.id.in_(list(to_change)))
+                .values(status=case(to_change, value=ReviewModel.id), claimed_by=None, claim_expires_at=None)
+                .returning(ReviewModel.id, ReviewModel.company_id, ReviewModel.rating)
+                .execution_options(synchronize_session=False)
+            )
+            changed = (await self.db.execute(stmt)).all()
+        updated_ids = {row.id for row in changed}
+        self._touched_reviews.update((row.id, row.company_id) for row in changed)
+
+        def outcome(review_id: int) -> str:
+            if review_id in updated_ids:
+                return "updated"
+            return "unchanged" if review_id in old_status else "not_found"
+
+        # company_id -> (ratings entering verified, ratings leaving it)
+        deltas: dict[int, tuple[list, list]] = {}
+        for row in changed:
+            was_verified = old_status[row.id] == ReviewStatus.VERIFIED.value
+            is_verified = wanted[row.id] == ReviewStatus.VERIFIED.value
+            if was_verified != is_verified:
+                added, removed = deltas.setdefault(row.company_id, ([], []))
+                (added if is_verified else removed).append(row.rating)
+        # Fixed lock order so concurrent batches cannot deadlock on company rows
+        for company_id in sorted(deltas):
+            await self._verified_changed(company_id, *deltas[company_id])
+
+        if changed:
+            moderated_at = datetime.utcnow()
+            await self.db.execute(insert(ModerationLog), [
+                {
+                    "review_id": row.id,
+                    "ai_score": None,
+                    "flagged_words": None,
+                    "moderator_decision": wanted[row.id],
+                    "moderator_id": moderator_id,
+                    "moderated_at": moderated_at,
+                }
+                for row in changed
+            ])
+        await self._commit()
+        return {
+            "updated": len(changed),
+            "results": [
+                {
+                    "review_id": review_id,
+                    "outcome": outcome(review_id),
+                    "status": wanted[review_id] if review_id in old_status else None,
+                }
+                for review_id in ids
+            ],
+        }
     
-    async def get_all_reviews(self, status: str | None = None, skip: int = 0, limit: int = 10) -> List[ReviewModel]:
+    async def get_all_reviews(self, status: str | None = None, skip: int = 0, limit: int = 10, cursor: str | None = None) -> KeysetPage:
         query = select(ReviewModel)
         if status:
             query = query.where(ReviewModel.status == status)
-        query = query.offset(skip).limit(limit)
-        result = await self.db.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        return await self._page(query, skip, limit, cursor)
\ No newline at end of file
@@ -0,0 +1,180 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, insert
+from app.db.dialect import dialect_insert
+from app.models.salary_model import SalaryModel
+from app.models.salary_aggregate_model import SalaryAggregateModel
+from app.utils.position import normalize_position
+from app.utils.quantile_sketch import QuantileSketch
+from typing import Optional
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def statistics_from_rollup(rows: list[SalaryAggregateModel]) -> Optional[dict]:
+    """Salary statistics of a set of rollup rows, shaped like SalaryService.get_salary_statistics."""
+    count = sum(row.count for row in rows)
+    if not count:
+        return None
+    sketch = QuantileSketch()
+    for row in rows:
+        sketch.merge(QuantileSketch.from_dict(row.sketch))
+    total = sum(row.salary_sum for row in rows)
+    total_squares = sum(row.salary_sum_squares for row in rows)
+    low = min(row.min_amount for row in rows)
+    high = max(row.max_amount for row in rows)
+
+    def clamp(value):
+        return None if value is None else min(max(value, low), high)
+
+    stats = {
+        "count": count,
+        "average": total / count,
+        "median": clamp(sketch.quantile(0.5)),
+        "min": low,
+        "max": high,
+        "percentile_25": None,
+        "percentile_75": None,
+        "approximate": True,
+    }
+    if count >= 2:
+        stats["percentile_25"] = clamp(sketch.quantile(0.25))
+        stats["percentile_75"] = clamp(sketch.quantile(0.75))
+        variance = (total_squares - total * total / count) / (count - 1)
+        stats["stddev"] = max(variance, 0.0) ** 0.5
+    else:
+        stats["stddev"] = None
+    return stats
+
+
+class SalaryAggregateService:
+    """Keeps the per (company, position) salary rollup in sync with `salaries`.
+
+    All methods run inside the caller's transaction; nothing here commits.
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def add(self, company_id: int, position: str, amount: float) -> None:
+        await self._apply(company_id, normalize_position(position), added=[amount])
+
+    async def remove(self, company_id: int, position: str, amount: float) -> None:
+        await self._apply(company_id, normalize_position(position), removed=[amount])
+
+    async def add_many(self, entries: list[tuple[int, str, float]]) -> None:
+        """Apply (company_id, position, amount) entries with one rollup update per key."""
+        groups: dict[tuple[int, str], list[float]] = {}
+        for company_id, position, amount in entries:
+            groups.setdefault((company_id, normalize_position(position)), []).append(amount)
+        # Fixed lock order so concurrent batches cannot deadlock each other
+        for (company_id, position_key) in sorted(groups):
+            await self._apply(company_id, position_key, added=groups[(company_id, position_key)])
+
+    async def _lock_row(self, company_id: int, position_key: str) -> SalaryAggregateModel:
+        # Create the row if it is missing, then lock it so concurrent writers serialize
+        stmt = dialect_insert(self.db, SalaryAggregateModel).values(
+            company_id=company_id,
+            position_key=position_key,
+            count=0,
+            salary_sum=0.0,
+            salary_sum_squares=0.0,
+        ).on_conflict_do_nothing(index_elements=["company_id", "position_key"])
+        await self.db.execute(stmt)
+        query = (
+            select(SalaryAggregateModel)
+            .where(
+                SalaryAggregateModel.company_id == company_id,
+                SalaryAggregateModel.position_key == position_key,
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return (await self.db.execute(query)).scalar_one()
+
+    async def _apply(self, company_id: int, position_key: str, added: list[float] = (), removed: list[float] = ()) -> None:
+        row = await self._lock_row(company_id, position_key)
+        sketch = QuantileSketch.from_dict(row.sketch)
+        for amount in added:
+            sketch.add(amount)
+        for amount in removed:
+            sketch.remove(amount)
+
+        row.count += len(added) - len(removed)
+        row.salary_sum += sum(added) - sum(removed)
+        row.salary_sum_squares += sum(a * a for a in added) - sum(a * a for a in removed)
+        if row.count <= 0:
+            await self.db.delete(row)
+            await self.db.flush()
+            return
+
+        row.sketch = sketch.to_dict()
+        extremes_removed = any(a == row.min_amount or a == row.max_amount for a in removed)
+        if extremes_removed:
+            # min/max are not invertible, rescan this key only
+            await self.db.flush()
+            query = select(func.min(SalaryModel.salary_amount), func.max(SalaryModel.salary_amount)).where(
+                SalaryModel.company_id == company_id,
+                SalaryModel.position_normalized == position_key,
+            )
+            row.min_amount, row.max_amount = (await self.db.execute(query)).one()
+        if added:
+            row.min_amount = min(added) if row.min_amount is None else min(row.min_amount, *added)
+            row.max_amount = max(added) if row.max_amount is None else max(row.max_amount, *added)
+        await self.db.flush()
+
+    async def get_statistics(self, company_id: Optional[int] = None, position: Optional[str] = None) -> Optional[dict]:
+        query = select(SalaryAggregateModel)
+        if company_id:
+            query = query.where(SalaryAggregateModel.company_id == company_id)
+        if position:
+            query = query.where(SalaryAggregateModel.position_key.contains(normalize_position(position), autoescape=True))
+        return statistics_from_rollup((await self.db.execute(query)).scalars().all())
+
+    async def get_statistics_many(self, company_ids: list[int]) -> dict[int, Optional[dict]]:
+        """Per-company statistics for several companies from one query."""
+        rows_by_company: dict[int, list[SalaryAggregateModel]] = {company_id: [] for company_id in company_ids}
+        query = select(SalaryAggregateModel).where(SalaryAggregateModel.company_id.in_(company_ids))
+        for row in (await self.db.execute(query)).scalars():
+            rows_by_company[row.company_id].append(row)
+        return {company_id: statistics_from_rollup(rows) for company_id, rows in rows_by_company.items()}
+
+    async def rebuild(self) -> int:
+        """Recompute the whole rollup from `salaries`. Returns the number of keys written."""
+        await self.db.execute(delete(SalaryAggregateModel))
+        groups: dict[tuple[int, str], dict] = {}
+        query = select(SalaryModel.company_id, SalaryModel.position_normalized, SalaryModel.salary_amount).execution_options(
+            yield_per=REBUILD_BATCH_SIZE
+        )
+        result = await self.db.stream(query)
+        async for company_id, position_key, amount in result:
+            key = (company_id, position_key)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "count": 0, "sum": 0.0, "squares": 0.0,
+                    "min": amount, "max": amount, "sketch": QuantileSketch(),
+                }
+            group["count"] += 1
+            group["sum"] += amount
+            group["squares"] += amount * amount
+            group["min"] = min(group["min"], amount)
+            group["max"] = max(group["max"], amount)
+            group["sketch"].add(amount)
+
+        rows = [
+            {
+                "company_id": company_id,
+                "position_key": position_key,
+                "count": group["count"],
+                "salary_sum": group["sum"],
+                "salary_sum_squares": group["squares"],
+                "min_amount": group["min"],
+                "max_amount": group["max"],
+                "sketch": group["sketch"].to_dict(),
+            }
+            for (company_id, position_key), group in groups.items()
+        ]
+        for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+            await self.db.execute(insert(SalaryAggregateModel), rows[start:start + REBUILD_BATCH_SIZE])
+        await self.db.commit()
+        return len(rows)
@@ -1,23 +1,154 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select,Update
+from sqlalchemy import select,Update,update,delete,func,Float,type_coerce,insert,case,literal
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import ARRAY,array
+from app.db.dialect import dialect_name,update_returning_previous
 from app.models.salary_model import SalaryModel
 from app.models.company_model import CompanyModel
 from app.schemas.salary_schema import SalaryResponse,SalaryCreate,SalaryUpdate
-from typing import List,Optional
-import statistics
+from app.services.salary_aggregate_service import SalaryAggregateService
+from app.services.company_summary_service import CompanySummaryService
+from app.services.company_leaderboard import sync_leaderboards
+from app.utils.position import normalize_position
+from app.utils.distribution import histogram,smoothed_density
+from app.core.cache import cache_get_json,cache_set_json,cache_version,bump_cache_version
+from typing import List,Optional,Iterable,Any
+from pydantic import ValidationError
 from fastapi import HTTPException
+import numpy as np
+
+BULK_CHUNK_SIZE = 1000
+DISTRIBUTION_CACHE_TTL = 3600
+# Below this many salaries the exact statistics are cheap, and sketch buckets would show
+EXACT_STATISTICS_THRESHOLD = 500
+
+SALARY_EXPORT_COLUMNS = [
+    "id", "company_id", "user_id", "position", "salary_amount",
+    "currency", "experience_years", "location", "created_at",
+]
+
+
+SALARY_GROUP_COLUMNS = {
+    "position": SalaryModel.position_normalized,
+    "location": func.coalesce(func.lower(func.trim(SalaryModel.location)),"unknown"),
+    "experience": case(
+        (SalaryModel.experience_years.is_(None),"unknown"),
+        (SalaryModel.experience_years < 1,"0-1"),
+        (SalaryModel.experience_years < 3,"1-3"),
+        (SalaryModel.experience_years < 5,"3-5"),
+        (SalaryModel.experience_years < 10,"5-10"),
+        else_="10+",
+    ),
+}
+
+
+def quartile_positions(n:int)->list[float]:
+    """0-based fractional ranks of the quartiles, same method as statistics.quantiles(n=4)."""
+    m = n + 1
+    positions = []
+    for i in range(1, 4):
+        j = min(max(i * m // 4, 1), n - 1)
+        delta = i * m - j * 4
+        positions.append((j - 1) + delta / 4)
+    return positions
+
+
+def interpolate(ordered:dict[int,float],position:float)->float:
+    # Same linear interpolation as statistics.quantiles, including extrapolation for n=2
+    low = min(max(int(position), 0), max(ordered) - 1) if len(ordered) > 1 else int(position)
+    if low + 1 not in ordered:
+        return ordered[low]
+    return ordered[low] + (ordered[low + 1] - ordered[low]) * (position - low)
+
 
 class SalaryService:
     def __init__(self,db_session:AsyncSession):
         self.db = db_session
+        self.aggregates = SalaryAggregateService(db_session)
+        self.summaries = CompanySummaryService(db_session)
 
     
     async def create_salary(self,salary_data:SalaryCreate,user_id:int)->SalaryModel:
         salary = SalaryModel(**salary_data.model_dump(),user_id=user_id)
         self.db.add(salary)
+        await self.db.flush()
+        await self.aggregates.add(salary.company_id,salary.position,salary.salary_amount)
+        await self.summaries.refresh_salaries(salary.company_id)
         await self.db.commit()
-        await self.db.refresh(salary)
+        await self._salaries_changed(salary.company_id)
+        # id and created_at are already populated by the flush, no refresh needed
         return salary
+
+    async def bulk_create(self,entries:Iterable[Any],user_id:int,chunk_size:int = BULK_CHUNK_SIZE)->dict:
+        """Validate and insert salaries chunk by chunk; invalid rows are reported, not fatal.
+
+        Entries are dicts or raw JSON documents (one NDJSON line each).
+        """
+        inserted = 0
+        errors = []
+        chunk = []
+        for index,entry in enumerate(entries):
+            chunk.append((index,entry))
+            if len(chunk) >= chunk_size:
+                inserted += await self._insert_chunk(chunk,user_id,errors)
+                chunk = []
+        if chunk:
+            inserted += await self._insert_chunk(chunk,user_id,errors)
+        return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+    async def _insert_chunk(self,chunk:list[tuple[int,Any]],user_id:int,errors:list)->int:
+        valid = []
+        for index,entry in chunk:
+            try:
+                if isinstance(entry,(str,bytes)):
+                    salary = SalaryCreate.model_validate_json(entry)
+                else:
+                    salary = SalaryCreate.model_validate(entry)
+                valid.append((index,salary))
+            except ValidationError as e:
+                errors.append({"index": index, "errors": e.errors(include_url=False,include_context=False)})
+
+        company_ids = {salary.company_id for _,salary in valid}
+        existing = set()
+        if company_ids:
+            query = select(CompanyModel.id).where(CompanyModel.id.in_(company_ids))
+            existing = set((await self.db.execute(query)).scalars().all())
+
+        rows = []
+        row_indexes = []
+        for index,salary in valid:
+            if salary.company_id not in existing:
+                errors.append({"index": index, "errors": [{"msg": f"Company with id {salary.company_id} not found"}]})
+                continue
+            row_indexes.append(index)
+            rows.append({
+                **salary.model_dump(),
+                "user_id": user_id,
+                "position_normalized": normalize_position(salary.position),
+            })
+        if not rows:
+            return 0
+
+        try:
+            # executemany: one round trip per chunk, one commit per chunk
+            await self.db.execute(insert(SalaryModel),rows)
+            await self.aggregates.add_many([(row["company_id"],row["position"],row["salary_amount"]) for row in rows])
+            await self.summaries.refresh_salaries(*{row["company_id"] for row in rows})
+            await self.db.commit()
+            await self._salaries_changed(*{row["company_id"] for row in rows})
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            message = str(e.orig) if getattr(e,"orig",None) is not None else str(e)
+            for index in row_indexes:
+                errors.append({"index": index, "errors": [{"msg": f"Chunk rejected by database: {message}"}]})
+            return 0
+        return len(rows)
+    
+    async def _salaries_changed(self,*company_ids:int):
+        # Drop cached distributions of these companies and of the cross-company view,
+        # and re-rank them by the median the summary refresh just wrote
+        await bump_cache_version("salary_distribution:all",*(f"salary_distribution:{company_id}" for company_id in company_ids))
+        await sync_leaderboards(self.db,*company_ids)
     
     async def get_salary(self,salary_id:int) -> Optional[SalaryModel]:
         query = select(SalaryModel).where(SalaryModel.id == salary_id)
@@ -27,83 +158,236 @@ class SalaryService:
     async def get_salary_by_company(self,company_id:int,position: Optional[str] = None, skip:int=0, limit:int=10)->List[SalaryModel]:
         query = select(SalaryModel).where(SalaryModel.company_id == company_id)
         if position:
-            query = query.where(SalaryModel.position.ilike(f"%{position}%"))
+            query = query.where(SalaryModel.position_normalized.contains(normalize_position(position),autoescape=True))
         query = query.offset(skip).limit(limit)
         result = await self.db.execute(query)
         return result.scalars().all()
     
+    async def export_batches(self,company_id:Optional[int] = None,batch_size:int = 2000):
+        """Yield salary rows (tuples in SALARY_EXPORT_COLUMNS order) from a server-side cursor."""
+        query = select(*[getattr(SalaryModel,column) for column in SALARY_EXPORT_COLUMNS]).order_by(SalaryModel.id)
+        if company_id:
+            query = query.where(SalaryModel.company_id == company_id)
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            yield batch
+    
+    def _can_modify(self,user):
+        # Owner or admin; folded into the UPDATE/DELETE itself so a mutation is one statement
+        if user.role == 'admin':
+            return ()
+        return (SalaryModel.user_id == user.id,)
+
     async def update_salary(self,salary_id:int,salary_data:SalaryUpdate,user)->Optional[SalaryModel]:
-        salary = await self.get_salary(salary_id)
+        values = salary_data.model_dump(exclude_unset=True)
+        criteria = self._can_modify(user)
+        previous = None
+        if not values:
+            salary = (await self.db.execute(select(SalaryModel).where(SalaryModel.id == salary_id,*criteria))).scalar_one_or_none()
+        elif "position" in values or "salary_amount" in values:
+            # Core UPDATE skips @validates, keep the normalized key in step by hand
+            if "position" in values:
+                values["position_normalized"] = normalize_position(values["position"])
+            result = await update_returning_previous(self.db,SalaryModel,salary_id,criteria,values,["position","salary_amount"])
+            salary,previous = result if result else (None,None)
+        else:
+            stmt = (
+                update(SalaryModel)
+                .where(SalaryModel.id == salary_id,*criteria)
+                .values(**values)
+                .returning(SalaryModel)
+                .execution_options(synchronize_session=False,populate_existing=True)
+            )
+            salary = (await self.db.execute(stmt)).scalar_one_or_none()
         if not salary:
+            # Missing and not allowed look the same to the caller
             raise HTTPException(status_code=404, detail="Salary not found")
-        # Allow update for owner, admin, or company owner
-        if user.role == 'admin':
-            pass
-        elif salary.user_id == user.id:
-            pass  # owner can update
-        else:
-            company_query = select(CompanyModel).where(CompanyModel.id == salary.company_id)
-            company_result = await self.db.execute(company_query)
-            company = company_result.scalar_one_or_none()
-            if not company or company.user_id != user.id:
-                raise HTTPException(status_code=404, detail="Salary not found")
-        for field,value in salary_data.model_dump(exclude_unset=True).items():
-            setattr(salary,field,value)
-
+        moved = previous is not None and (previous["position"],previous["salary_amount"]) != (salary.position,salary.salary_amount)
+        if moved:
+            # Only position and amount feed the rollup and the company summary
+            await self.aggregates.remove(salary.company_id,previous["position"],previous["salary_amount"])
+            await self.aggregates.add(salary.company_id,salary.position,salary.salary_amount)
+            await self.summaries.refresh_salaries(salary.company_id)
         await self.db.commit()
-        await self.db.refresh(salary)
+        if moved:
+            await self._salaries_changed(salary.company_id)
         return salary
     
     async def delete_salary(self,salary_id:int,user)->bool:
-        salary = await self.get_salary(salary_id)
-        if not salary:
+        stmt = (
+            delete(SalaryModel)
+            .where(SalaryModel.id == salary_id,*self._can_modify(user))
+            .returning(SalaryModel.company_id,SalaryModel.position,SalaryModel.salary_amount)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = (await self.db.execute(stmt)).first()
+        if not deleted:
             return False
-        # Allow delete if user is admin, owner, or company owner
-        if user.role == 'admin':
-            pass
-        elif salary.user_id == user.id:
-            pass
-        else:
-            company_query = select(CompanyModel).where(CompanyModel.id == salary.company_id)
-            company_result = await self.db.execute(company_query)
-            company = company_result.scalar_one_or_none()
-            if not company or company.user_id != user.id:
-                return False
-        await self.db.delete(salary)
+        await self.aggregates.remove(deleted.company_id,deleted.position,deleted.salary_amount)
+        await self.summaries.refresh_salaries(deleted.company_id)
         await self.db.commit()
+        await self._salaries_changed(deleted.company_id)
         return True
     
-    async def get_salary_statistics(self,company_id:Optional[int] = None,position: Optional[str] = None)->dict:
-        query = select(SalaryModel.salary_amount)
+    async def get_salary_statistics(self,company_id:Optional[int] = None,position: Optional[str] = None,exact:bool = False)->dict:
+        # Served from salary_aggregates (approximate percentiles) unless exact values are requested
+        # or the set is small; "approximate" in the response tells which one was used
+        stats = None
+        if not exact:
+            stats = await self.aggregates.get_statistics(company_id,position)
+        if not stats or stats["count"] < EXACT_STATISTICS_THRESHOLD:
+            stats = await self.get_exact_statistics(company_id,position)
+        if not stats:
+            return {"error": "No salary data found"}
+        return stats
+
+    def _filter_statistics(self,query,company_id:Optional[int],position:Optional[str]):
         if company_id:
             query = query.where(SalaryModel.company_id == company_id)
         if position:
-            query = query.where(SalaryModel.position.ilike(f"%{position}%"))
+            query = query.where(SalaryModel.position_normalized.contains(normalize_position(position),autoescape=True))
+        return query
 
-        result = await self.db.execute(query)
-        salaries = result.scalars().all()
+    async def get_exact_statistics(self,company_id:Optional[int] = None,position: Optional[str] = None)->Optional[dict]:
+        """Exact statistics computed inside the database, matches the `statistics` module output."""
+        amount = SalaryModel.salary_amount
+        summary_query = self._filter_statistics(
+            select(
+                func.count(amount),
+                func.avg(amount),
+                func.min(amount),
+                func.max(amount),
+                func.sum(amount),
+                func.sum(amount * amount),
+            ),
+            company_id,position
+        )
+        count,average,low,high,total,total_squares = (await self.db.execute(summary_query)).one()
+        if not count:
+            return None
 
-        if not salaries:
-            return {"error": "No salary data found"}
-        
         stats = {
-            "count": len(salaries),
-            "average": statistics.mean(salaries),
-            "median": statistics.median(salaries),
-            "min": min(salaries),
-            "max": max(salaries)
+            "count": count,
+            "average": average,
+            "median": low,
+            "min": low,
+            "max": high,
+            "percentile_25": None,
+            "percentile_75": None,
+            "stddev": None,
+            "approximate": False,
         }
-        
-        if len(salaries) >= 2:
-            try:
-                quantiles = statistics.quantiles(salaries, n=4)
-                stats["percentile_25"] = quantiles[0]
-                stats["percentile_75"] = quantiles[2]
-            except statistics.StatisticsError:
-                stats["percentile_25"] = None
-                stats["percentile_75"] = None
+        if count < 2:
+            return stats
+
+        positions = quartile_positions(count)
+        if dialect_name(self.db) == "postgresql":
+            # percentile_cont only takes fractions in [0, 1]; n=2 extrapolates from min/max instead
+            fractions = [min(max(p / (count - 1), 0.0), 1.0) for p in positions]
+            query = self._filter_statistics(
+                select(type_coerce(func.percentile_cont(array(fractions)).within_group(amount), ARRAY(Float))),
+                company_id,position
+            )
+            values = (await self.db.execute(query)).scalar_one()
+            if count == 2:
+                values = [interpolate({0: low, 1: high}, p) for p in positions]
         else:
-            stats["percentile_25"] = None
-            stats["percentile_75"] = None
-        
+            # Generic fallback: number the sorted rows once and fetch only the neighbours we need
+            wanted = sorted({int(p) for p in positions} | {int(p) + 1 for p in positions})
+            ranked = self._filter_statistics(
+                select(amount.label("amount"), (func.row_number().over(order_by=amount) - 1).label("rank")),
+                company_id,position
+            ).subquery()
+            query = select(ranked.c.rank, ranked.c.amount).where(ranked.c.rank.in_(wanted))
+            ordered = {rank: value for rank, value in (await self.db.execute(query)).all()}
+            values = [interpolate(ordered, p) for p in positions]
+
+        stats["percentile_25"],stats["median"],stats["percentile_75"] = values
+        variance = (total_squares - total * total / count) / (count - 1)
+        stats["stddev"] = max(variance, 0.0) ** 0.5
         return stats
+
+    async def get_salary_distribution(self,company_id:Optional[int] = None,position:Optional[str] = None,bins:int = 20,strategy:str = "fixed")->dict:
+        """Histogram plus smoothed density of salary amounts, cached until the company's salaries change."""
+        namespace = f"salary_distribution:{company_id or 'all'}"
+        version = await cache_version(namespace)
+        cache_key = f"{namespace}:{version}:{normalize_position(position)}:{strategy}:{bins}"
+        cached = await cache_get_json(cache_key)
+        if cached is not None:
+            return cached
+
+        query = self._filter_statistics(select(SalaryModel.salary_amount),company_id,position)
+        amounts = np.asarray((await self.db.execute(query)).scalars().all(),dtype=np.float64)
+        if not amounts.size:
+            return {"error": "No salary data found"}
+
+        counts,edges = histogram(amounts,bins,strategy)
+        centers = (edges[:-1] + edges[1:]) / 2
+        density,bandwidth = smoothed_density(amounts,centers)
+        distribution = {
+            "count": int(amounts.size),
+            "strategy": strategy,
+            "edges": edges.tolist(),
+            "counts": counts.tolist(),
+            "density": density.tolist() if density is not None else None,
+            "bandwidth": bandwidth,
+        }
+        await cache_set_json(cache_key,distribution,DISTRIBUTION_CACHE_TTL)
+        return distribution
+
+    async def get_grouped_statistics(self,company_id:Optional[int] = None,group_by:list[str] = ("position",),skip:int = 0,limit:int = 50)->dict:
+        """count/avg/min/max/median/p25/p75 per group in one GROUP BY query.
+
+        Rows are numbered within each group by a window function, and the
+        quartiles are interpolated from the neighbouring ranks exactly like
+        statistics.quantiles, so every group matches the single-group output.
+        """
+        keys = [SALARY_GROUP_COLUMNS[name].label(name) for name in group_by]
+        amount = SalaryModel.salary_amount
+        ranked = self._filter_statistics(
+            select(
+                *keys,
+                amount.label("amount"),
+                func.row_number().over(partition_by=keys,order_by=amount).label("rank"),
+                func.count().over(partition_by=keys).label("count"),
+            ),
+            company_id,None
+        ).subquery()
+        count = ranked.c.count
+
+        def quartile(i:int):
+            # 1-based exclusive method: j = i*(n+1)//4 clamped to [1, n-1], weight delta/4 on rank j+1
+            raw = (count + 1) * i // 4
+            j = case((raw < 1,1),(raw > count - 1,count - 1),else_=raw)
+            delta = (count + 1) * i - j * 4
+            return func.sum(case(
+                (ranked.c.rank == j,ranked.c.amount * (4 - delta)),
+                (ranked.c.rank == j + 1,ranked.c.amount * delta),
+                else_=0,
+            )) / 4.0
+
+        group_keys = [ranked.c[name] for name in group_by]
+        query = (
+            select(
+                *group_keys,
+                count,
+                func.avg(ranked.c.amount).label("average"),
+                func.min(ranked.c.amount).label("min"),
+                func.max(ranked.c.amount).label("max"),
+                case((count < 2,func.max(ranked.c.amount)),else_=quartile(2)).label("median"),
+                case((count < 2,literal(None)),else_=quartile(1)).label("percentile_25"),
+                case((count < 2,literal(None)),else_=quartile(3)).label("percentile_75"),
+            )
+            .group_by(*group_keys,count)
+            .order_by(count.desc(),*group_keys)
+            .offset(skip)
+            .limit(limit + 1)
+        )
+        rows = (await self.db.execute(query)).mappings().all()
+        return {
+            "group_by": list(group_by),
+            "skip": skip,
+            "limit": limit,
+            "has_more": len(rows) > limit,
+            "groups": [dict(row) for row in rows[:limit]],
+        }
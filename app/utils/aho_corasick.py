@@ -0,0 +1,78 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text regardless of how many words are loaded.
+
+    Patterns and text are matched case-insensitively. With `whole_words` a hit only counts
+    when it is not glued to other letters or digits, so "class" does not match "ass".
+    """
+
+    def __init__(self, patterns, whole_words: bool = True):
+        self.whole_words = whole_words
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[str, ...]] = [()]
+        self._size = 0
+        for pattern in patterns:
+            self._insert(pattern.strip().lower())
+        self._build()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _insert(self, pattern: str) -> None:
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if not self._out[state]:
+            self._out[state] = (pattern,)
+            self._size += 1
+
+    def _build(self) -> None:
+        # Breadth-first so every fail target is finalised before it is used
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """Yield (start, pattern) for every occurrence in `text`."""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in out[state]:
+                start = end - len(pattern) + 1
+                if self.whole_words and not self._is_whole(text, start, end + 1):
+                    continue
+                yield start, pattern
+
+    def count(self, text: str) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for _, pattern in self.iter_matches(text):
+            counts[pattern] = counts.get(pattern, 0) + 1
+        return counts
+
+    @staticmethod
+    def _is_whole(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
@@ -0,0 +1,42 @@
+import numpy as np
+
+DENSITY_GRID_SIZE = 512
+
+
+def histogram(amounts: np.ndarray, bins: int, strategy: str = "fixed") -> tuple[np.ndarray, np.ndarray]:
+    """Bin counts and edges; "quantile" puts roughly the same number of salaries in each bin."""
+    if strategy == "quantile":
+        edges = np.unique(np.quantile(amounts, np.linspace(0.0, 1.0, bins + 1)))
+        if edges.size < 2:
+            edges = np.array([edges[0], edges[0]])
+        counts, edges = np.histogram(amounts, bins=edges)
+    else:
+        counts, edges = np.histogram(amounts, bins=bins)
+    return counts, edges
+
+
+def smoothed_density(amounts: np.ndarray, points: np.ndarray) -> tuple[np.ndarray | None, float]:
+    """Gaussian KDE evaluated at `points`, using linear binning on a fixed grid.
+
+    Cost is O(n + grid) instead of O(n * points) for a direct KDE.
+    """
+    n = amounts.size
+    spread = min(np.std(amounts, ddof=1) if n > 1 else 0.0, np.subtract(*np.percentile(amounts, [75, 25])) / 1.34)
+    if spread <= 0:
+        spread = np.std(amounts, ddof=1) if n > 1 else 0.0
+    bandwidth = 0.9 * spread * n ** -0.2
+    if bandwidth <= 0:
+        return None, 0.0
+
+    low = amounts.min() - 3 * bandwidth
+    high = amounts.max() + 3 * bandwidth
+    counts, edges = np.histogram(amounts, bins=DENSITY_GRID_SIZE, range=(low, high))
+    step = edges[1] - edges[0]
+    centers = edges[:-1] + step / 2
+
+    half_width = int(np.ceil(3 * bandwidth / step))
+    offsets = np.arange(-half_width, half_width + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    smoothed = np.convolve(counts, kernel)[half_width:half_width + counts.size]
+    smoothed = smoothed / (smoothed.sum() * step)
+    return np.interp(points, centers, smoothed, left=0.0, right=0.0), float(bandwidth)
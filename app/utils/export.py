@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Callable, Sequence
+
+from fastapi import HTTPException
+from starlette.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import async_session
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def _encode(batches: AsyncIterator[Sequence[tuple]], columns: list[str], export_format: str) -> AsyncIterator[str]:
+    # One chunk per database batch: the next batch is only fetched once the client took this one
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        async for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([[_plain(value) for value in row] for row in batch])
+            yield buffer.getvalue()
+    else:
+        async for batch in batches:
+            yield "".join(
+                json.dumps({column: _plain(value) for column, value in zip(columns, row)}, ensure_ascii=False) + "\n"
+                for row in batch
+            )
+
+
+def streaming_export(
+    fetch: Callable[[AsyncSession], AsyncIterator[Sequence[tuple]]],
+    columns: list[str],
+    export_format: str,
+    filename: str,
+) -> StreamingResponse:
+    """Stream rows produced by `fetch(db)` as NDJSON or CSV.
+
+    The request's own session is closed before the body is sent, so the
+    export opens a dedicated session that lives as long as the stream.
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {export_format}")
+
+    async def batches():
+        async with async_session() as db:
+            async for batch in fetch(db):
+                yield batch
+
+    extension = "csv" if export_format == "csv" else "ndjson"
+    return StreamingResponse(
+        _encode(batches(), columns, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
@@ -0,0 +1,118 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, NamedTuple, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+class KeysetPage(NamedTuple):
+    items: list
+    next_cursor: str | None
+    prev_cursor: str | None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def _value_matches(column, value) -> bool:
+    # A cursor value must bind like the column it seeks on, or the database rejects the query
+    if value is None:
+        return True
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        # Untyped expressions (search ranks) are always numeric here
+        expected = float
+    if expected is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, expected)
+
+
+def encode_cursor(values: Sequence[Any], direction: str = "next", sort: str = "") -> str:
+    payload = json.dumps(
+        {"v": [_encode_value(v) for v in values], "d": direction, "s": sort},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[list, str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload["v"]]
+        direction = payload.get("d", "next")
+        sort = payload.get("s", "")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if direction not in ("next", "prev") or not isinstance(sort, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values, direction, sort
+
+
+async def keyset_paginate(db, query, order_columns: list, cursor: str | None, limit: int, descending: bool = True, scalars: bool = True, key_of=None, sort: str = "") -> KeysetPage:
+    """Run `query` one page at a time, seeking on `order_columns` instead of using OFFSET.
+
+    The last order column must be unique (usually the primary key) so the order is total.
+    Cursors are opaque; "prev" cursors walk back towards the first page. `key_of(row)`
+    returns the order values of a row when they are not plain attributes of it. `sort`
+    names the ordering; a cursor from another ordering, or with values that do not fit
+    `order_columns`, is rejected with 400.
+    """
+    sort = f"{sort}:{'desc' if descending else 'asc'}"
+    direction = "next"
+    if cursor:
+        values, direction, cursor_sort = decode_cursor(cursor)
+        if (
+            cursor_sort != sort
+            or len(values) != len(order_columns)
+            or not all(_value_matches(column, value) for column, value in zip(order_columns, values))
+        ):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # Moving backwards means scanning the index the other way
+        forward = descending if direction == "next" else not descending
+        key = tuple_(*order_columns)
+        query = query.where(key < tuple_(*values) if forward else key > tuple_(*values))
+
+    scan_descending = descending if direction == "next" else not descending
+    query = query.order_by(*[column.desc() if scan_descending else column.asc() for column in order_columns])
+    result = await db.execute(query.limit(limit + 1))
+    rows = list(result.scalars().all() if scalars else result.all())
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    if key_of is None:
+        def key_of(row):
+            return [getattr(row, column.key) for column in order_columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or direction == "prev":
+            next_cursor = encode_cursor(key_of(rows[-1]), "next", sort)
+        if cursor and (direction == "next" or has_more):
+            prev_cursor = encode_cursor(key_of(rows[0]), "prev", sort)
+    return KeysetPage(rows, next_cursor, prev_cursor)
+
+
+def set_page_headers(response, page: KeysetPage) -> None:
+    # The body stays a plain list for existing clients; cursors travel in headers
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.prev_cursor:
+        response.headers["X-Prev-Cursor"] = page.prev_cursor
@@ -0,0 +1,41 @@
+import re
+
+# Abbreviations collapsed to one spelling so "Sr. SWE" and "senior software engineer" match
+POSITION_SYNONYMS = {
+    "sr": "senior",
+    "snr": "senior",
+    "jr": "junior",
+    "jnr": "junior",
+    "mid": "middle",
+    "dev": "developer",
+    "eng": "engineer",
+    "engr": "engineer",
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "mgr": "manager",
+    "qa": "quality assurance",
+    "ml": "machine learning",
+    "ds": "data scientist",
+}
+
+_COMPOUNDS = [
+    (re.compile(r"\bfront[\s-]+end\b"), "frontend"),
+    (re.compile(r"\bback[\s-]+end\b"), "backend"),
+    (re.compile(r"\bfull[\s-]+stack\b"), "fullstack"),
+]
+_SEPARATORS = re.compile(r"[\s,/_\-()]+")
+
+
+def normalize_position(position: str | None) -> str:
+    """Canonical position key: lowercased, trimmed, separators and synonyms collapsed."""
+    if not position:
+        return ""
+    text = position.strip().lower()
+    for pattern, replacement in _COMPOUNDS:
+        text = pattern.sub(replacement, text)
+    tokens = []
+    for token in _SEPARATORS.split(text):
+        token = token.rstrip(".")
+        if token:
+            tokens.append(POSITION_SYNONYMS.get(token, token))
+    return " ".join(tokens)
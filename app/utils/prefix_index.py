@@ -0,0 +1,72 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Any, Iterable
+
+_MAX_CHAR = "\U0010ffff"
+# Prefixes matching more entries than this get their top results memoized until the next write
+MEMO_MIN_MATCHES = 256
+MEMO_SIZE = 50
+
+
+class PrefixIndex:
+    """In-memory prefix search over a sorted array of (key, id) pairs.
+
+    A lookup is two bisects to find the slice of keys starting with the prefix, then a
+    top-k by score over the distinct ids in that slice. An item may be reachable through
+    several keys (e.g. every word of a name). Writes are O(n) list inserts, which is fine
+    for data that changes far less often than it is read. Short, popular prefixes match
+    most of the array, so their results are memoized and dropped on every write.
+    """
+
+    def __init__(self):
+        self._entries: list[tuple[str, int]] = []
+        self._items: dict[int, tuple[float, Any]] = {}
+        self._keys: dict[int, list[str]] = {}
+        self._memo: dict[str, list[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def build(self, items: Iterable[tuple[int, list[str], float, Any]]) -> None:
+        """Replace the whole index with (id, keys, score, payload) items."""
+        entries, scored, keys_by_id = [], {}, {}
+        for item_id, keys, score, payload in items:
+            keys = sorted(set(keys))
+            entries.extend((key, item_id) for key in keys)
+            scored[item_id] = (score, payload)
+            keys_by_id[item_id] = keys
+        entries.sort()
+        # Swap in one go so readers never see a half-built index
+        self._entries, self._items, self._keys, self._memo = entries, scored, keys_by_id, {}
+
+    def upsert(self, item_id: int, keys: list[str], score: float, payload: Any) -> None:
+        self.remove(item_id)
+        keys = sorted(set(keys))
+        for key in keys:
+            insort(self._entries, (key, item_id))
+        self._items[item_id] = (score, payload)
+        self._keys[item_id] = keys
+
+    def remove(self, item_id: int) -> None:
+        for key in self._keys.pop(item_id, ()):
+            position = bisect_left(self._entries, (key, item_id))
+            if position < len(self._entries) and self._entries[position] == (key, item_id):
+                del self._entries[position]
+        self._items.pop(item_id, None)
+        self._memo = {}
+
+    def search(self, prefix: str, limit: int = 10) -> list[Any]:
+        if not prefix:
+            return []
+        memoized = self._memo.get(prefix)
+        if memoized is not None and limit <= MEMO_SIZE:
+            return memoized[:limit]
+        low = bisect_left(self._entries, (prefix,))
+        high = bisect_left(self._entries, (prefix + _MAX_CHAR,), low)
+        ids = {item_id for _, item_id in self._entries[low:high]}
+        items = self._items
+        best = heapq.nlargest(max(limit, MEMO_SIZE), ids, key=lambda item_id: (items[item_id][0], -item_id))
+        results = [items[item_id][1] for item_id in best]
+        if high - low > MEMO_MIN_MATCHES:
+            self._memo[prefix] = results
+        return results[:limit]
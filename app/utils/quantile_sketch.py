@@ -0,0 +1,94 @@
+import math
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with fixed relative accuracy (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so adding, removing and merging
+    are plain counter updates and the sketch can be stored as JSON.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, bins: dict[int, int] | None = None, zero_count: int = 0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = dict(bins or {})
+        self.zero_count = zero_count
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, n: int = 1) -> None:
+        if value <= 0:
+            self.zero_count += n
+            return
+        key = self._key(value)
+        self.bins[key] = self.bins.get(key, 0) + n
+
+    def remove(self, value: float, n: int = 1) -> None:
+        if value <= 0:
+            self.zero_count = max(self.zero_count - n, 0)
+            return
+        key = self._key(value)
+        remaining = self.bins.get(key, 0) - n
+        if remaining > 0:
+            self.bins[key] = remaining
+        else:
+            self.bins.pop(key, None)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.zero_count += other.zero_count
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+
+    def _ranked_value(self, rank: int) -> float:
+        # Value of the bucket holding the rank-th smallest value (0-based)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.bins))
+
+    def quantile(self, q: float) -> float | None:
+        """Interpolated between neighbouring ranks like statistics.quantiles (exclusive method).
+
+        The median therefore matches statistics.median, and every result is within the
+        relative accuracy of the exact one, apart from positions clamped at either end.
+        """
+        total = self.count
+        if total == 0:
+            return None
+        position = min(max(q * (total + 1) - 1, 0.0), total - 1)
+        low = int(position)
+        below = self._ranked_value(low)
+        if position == low:
+            return below
+        above = self._ranked_value(low + 1)
+        return below + (above - below) * (position - low)
+
+    def to_dict(self) -> dict:
+        return {
+            "alpha": self.relative_accuracy,
+            "zero": self.zero_count,
+            "bins": {str(key): n for key, n in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "QuantileSketch":
+        if not data:
+            return cls()
+        return cls(
+            relative_accuracy=data.get("alpha", 0.01),
+            bins={int(key): n for key, n in data.get("bins", {}).items()},
+            zero_count=data.get("zero", 0),
+        )
@@ -0,0 +1,116 @@
+"""Event-loop latency of a cheap endpoint while logins saturate the worker.
+
+Usage (needs the usual .env for app settings):
+    python -m benchmarks.bench_password_hashing [--seconds 5] [--logins 16] [--rounds 29000]
+
+Runs a small app with the project's hashing helpers in three scenarios: no logins,
+logins verifying passwords inline on the event loop (the old behaviour), and logins
+verifying on the bounded hashing pool. A pinger hits the cheap endpoint throughout;
+its p50/p99 should stay close to the idle numbers only in the offloaded scenario.
+Logins rejected with 503 by the pending limit are counted separately.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.security import pwd_context, verify_password, verify_password_async
+
+PING_INTERVAL = 0.005
+SHED_BACKOFF = 0.1
+
+
+def build_app(stored_hash: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/login/inline")
+    async def login_inline(password: str):
+        if not verify_password(password, stored_hash):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.post("/login/offloaded")
+    async def login_offloaded(password: str):
+        matches, _ = await verify_password_async(password, stored_hash)
+        if not matches:
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    return app
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def scenario(client: httpx.AsyncClient, mode: str | None, seconds: float, logins: int) -> dict:
+    deadline = time.perf_counter() + seconds
+    latencies: list[float] = []
+    outcomes = {"ok": 0, "shed": 0}
+
+    async def pinger():
+        # Latency is measured from when each ping was due, so time spent waiting for a
+        # blocked loop to even send it counts (no coordinated omission)
+        due = time.perf_counter()
+        while due < deadline:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get("/ping")
+            latencies.append(time.perf_counter() - due)
+            due += PING_INTERVAL
+
+    async def login_loop():
+        while time.perf_counter() < deadline:
+            response = await client.post(f"/login/{mode}", params={"password": "correct horse"})
+            if response.status_code == 503:
+                outcomes["shed"] += 1
+                # Shorter than the advertised Retry-After, to keep the pool saturated
+                await asyncio.sleep(SHED_BACKOFF)
+            else:
+                outcomes["ok"] += 1
+            # In-process transport never suspends on I/O; a real socket would yield here
+            await asyncio.sleep(0)
+
+    workers = [pinger()] + ([login_loop() for _ in range(logins)] if mode else [])
+    await asyncio.gather(*workers)
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "logins_per_s": outcomes["ok"] / seconds,
+        "shed": outcomes["shed"],
+    }
+
+
+async def run(seconds: float, logins: int, rounds: int | None):
+    context = pwd_context.copy(pbkdf2_sha256__default_rounds=rounds) if rounds else pwd_context
+    stored_hash = context.hash("correct horse")
+    app = build_app(stored_hash)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'scenario':>10} {'ping p50 ms':>12} {'ping p99 ms':>12} {'logins/s':>9} {'shed':>6}")
+        for label, mode in (("idle", None), ("inline", "inline"), ("offloaded", "offloaded")):
+            result = await scenario(client, mode, seconds, logins)
+            print(
+                f"{label:>10} {result['p50_ms']:>12.2f} {result['p99_ms']:>12.2f} "
+                f"{result['logins_per_s']:>9.1f} {result['shed']:>6}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each scenario")
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login loops")
+    parser.add_argument("--rounds", type=int, help="pbkdf2 rounds of the stored hash (default: app setting)")
+    args = parser.parse_args()
+    asyncio.run(run(args.seconds, args.logins, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compare Python-side and database-side salary statistics.
+
+Usage (needs the usual .env for app settings):
+    python -m benchmarks.bench_salary_statistics [--url postgresql+asyncpg://...] [--sizes 10000 100000 1000000]
+
+Without --url a throwaway SQLite file is used. The benchmark creates missing
+tables and a company per size, and deletes the salaries it inserted afterwards;
+still, point it at a scratch database.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert, select, delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.models.company_model import CompanyModel
+from app.models.user_model import UserModel
+from app.models.salary_model import SalaryModel
+from app.services.salary_service import SalaryService
+
+INSERT_BATCH = 10000
+
+
+def python_statistics(salaries: list[float]) -> dict:
+    # The original implementation: load everything, summarize in Python
+    quantiles = statistics.quantiles(salaries, n=4)
+    return {
+        "count": len(salaries),
+        "average": statistics.mean(salaries),
+        "median": statistics.median(salaries),
+        "min": min(salaries),
+        "max": max(salaries),
+        "percentile_25": quantiles[0],
+        "percentile_75": quantiles[2],
+    }
+
+
+async def seed(db: AsyncSession, size: int) -> int:
+    company = CompanyModel(name=f"bench-{size}-{random.random()}")
+    user = (await db.execute(select(UserModel).limit(1))).scalar_one_or_none()
+    if user is None:
+        user = UserModel(username=f"bench-{random.random()}", email=f"{random.random()}@bench.local")
+        db.add(user)
+    db.add(company)
+    await db.flush()
+    for start in range(0, size, INSERT_BATCH):
+        rows = [
+            {
+                "company_id": company.id,
+                "user_id": user.id,
+                "position": "engineer",
+                "salary_amount": round(random.lognormvariate(8.5, 0.4), 2),
+            }
+            for _ in range(min(INSERT_BATCH, size - start))
+        ]
+        await db.execute(insert(SalaryModel), rows)
+    await db.commit()
+    return company.id
+
+
+async def timed(coro_factory, repeat: int = 3):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await coro_factory()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+async def run(url: str, sizes: list[int]):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    print(f"{'rows':>10} {'python (s)':>12} {'database (s)':>13} {'speedup':>8}  match")
+    for size in sizes:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            company_id = await seed(db, size)
+            service = SalaryService(db)
+
+            async def in_python():
+                query = select(SalaryModel.salary_amount).where(SalaryModel.company_id == company_id)
+                return python_statistics((await db.execute(query)).scalars().all())
+
+            async def in_database():
+                return await service.get_exact_statistics(company_id)
+
+            python_time, expected = await timed(in_python)
+            database_time, actual = await timed(in_database)
+            match = all(abs(expected[key] - actual[key]) <= 1e-6 * max(abs(expected[key]), 1) for key in expected)
+            print(f"{size:>10} {python_time:>12.4f} {database_time:>13.4f} {python_time / database_time:>7.1f}x  {match}")
+            await db.execute(delete(SalaryModel).where(SalaryModel.company_id == company_id))
+            await db.commit()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="async SQLAlchemy URL of a scratch database")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    url = args.url
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(run(url, args.sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+
+# Settings are read at import time; tests run against SQLite and need no real secrets
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("OAUTH_GOOGLE_CLIENT_ID", "test")
+os.environ.setdefault("OAUTH_GOOGLE_CLIENT_SECRET", "test")
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+# Loads every model in the order the app does; importing one model module first is circular
+from app.db.base import Base
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(tmp_path):
+    """Session on a fresh SQLite database with every table created."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements(db):
+    """SQL of every statement the `db` session sends, in order."""
+    issued: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        issued.append(statement)
+
+    sync_engine = db.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", record)
+    yield issued
+    event.remove(sync_engine, "before_cursor_execute", record)
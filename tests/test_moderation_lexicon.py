@@ -0,0 +1,28 @@
+from app.services.moderation_pipeline import Lexicon
+
+
+def write_lexicon(tmp_path, text):
+    path = tmp_path / "lexicon.txt"
+    path.write_text(text, encoding="utf-8")
+    lexicon = Lexicon(path)
+    lexicon.load()
+    return lexicon
+
+
+def test_bare_and_weighted_phrases(tmp_path):
+    lexicon = write_lexicon(tmp_path, "# comment\n\nBadWord\nworse:2\n  spaced phrase : 0.5 \n")
+    weights, _ = lexicon._compiled
+    assert weights == {"badword": 1.0, "worse": 2.0, "spaced phrase": 0.5}
+
+
+def test_colon_without_weight_stays_in_phrase(tmp_path):
+    lexicon = write_lexicon(tmp_path, "ratio: terrible\n")
+    weights, _ = lexicon._compiled
+    assert weights == {"ratio: terrible": 1.0}
+
+
+def test_bare_phrase_is_scored(tmp_path):
+    lexicon = write_lexicon(tmp_path, "badword\nworse:2\n")
+    score, hits = lexicon.score("this badword is bad")
+    assert hits == {"badword": 1}
+    assert score > 0
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company_model import CompanyModel
+from app.models.review_model import ReviewModel
+from app.models.user_model import UserModel
+from app.services.review_service import ReviewService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def reviews(db):
+    # Written straight to the table, so only the index backfill can make them searchable
+    db.add(UserModel(id=1, username="author", email="author@example.com"))
+    db.add(CompanyModel(id=1, name="Acme"))
+    for review_id in range(1, 6):
+        content = "great boss" if review_id > 3 else "long hours"
+        db.add(ReviewModel(id=review_id, company_id=1, user_id=1, rating=4, title=f"Review {review_id}", content=content))
+    await db.commit()
+    return db
+
+
+async def search_ids(engine, q):
+    # A request session: searches, then closes without committing
+    async with AsyncSession(engine) as session:
+        page = await ReviewService(session).search_reviews(q)
+        return [review.id for review in page.items]
+
+
+async def test_backfill_outlives_the_first_search_session(reviews):
+    engine = reviews.bind
+    assert await search_ids(engine, "boss") == [5, 4]
+    async with AsyncSession(engine) as session:
+        indexed = (await session.execute(text("SELECT count(*) FROM reviews_fts"))).scalar_one()
+    assert indexed == 5
+    assert await search_ids(engine, "boss") == [5, 4]
+
+
+async def test_blank_query_finds_nothing(reviews):
+    assert await search_ids(reviews.bind, "   ") == []
@@ -0,0 +1,199 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.dialect import update_returning_previous
+from app.models.company_model import CompanyModel
+from app.models.company_summary_model import CompanySummaryModel
+from app.models.review_model import ReviewModel
+from app.models.salary_aggregate_model import SalaryAggregateModel
+from app.models.salary_model import SalaryModel
+from app.models.user_model import UserModel
+from app.schemas.review_schema import ReviewUpdate
+from app.schemas.salary_schema import SalaryUpdate
+from app.services.company_summary_service import CompanySummaryService
+from app.services.review_service import ReviewService
+from app.services.salary_aggregate_service import SalaryAggregateService
+from app.services.salary_service import SalaryService
+
+pytestmark = pytest.mark.anyio
+
+# The services only read id and role of the caller
+OWNER = SimpleNamespace(id=1, role="user")
+STRANGER = SimpleNamespace(id=2, role="user")
+ADMIN = SimpleNamespace(id=3, role="admin")
+
+# SQLite keeps review search in reviews_fts, maintained statement by statement;
+# on PostgreSQL reviews.search_vector is a generated column and these do not exist
+FTS_REINDEX = ["DELETE reviews_fts", "INSERT reviews_fts"]
+# After the commit, the leaderboards re-read the metrics of the touched company
+LEADERBOARD_SYNC = ["SELECT companies"]
+
+_SHAPE = re.compile(r"^\s*(?:(SELECT)\b.*?\bFROM\s+(\w+)|(INSERT)\s+INTO\s+(\w+)|(UPDATE)\s+(\w+)|(DELETE)\s+FROM\s+(\w+))", re.S)
+
+
+def shapes(statements: list[str]) -> list[str]:
+    """Each statement as "VERB table", e.g. "UPDATE reviews"."""
+    return [" ".join(part for part in _SHAPE.match(sql).groups() if part) for sql in statements]
+
+
+@pytest.fixture
+async def seeded(db):
+    for user in (OWNER, STRANGER, ADMIN):
+        db.add(UserModel(id=user.id, username=f"user{user.id}", email=f"user{user.id}@example.com", role=user.role))
+    db.add(CompanyModel(id=1, name="Acme", review_count=1, rating_sum=4.0, rating=4.0))
+    db.add(ReviewModel(id=1, company_id=1, user_id=OWNER.id, rating=4, title="Fine", content="Decent place", status="verified"))
+    for salary_id, amount in ((1, 100.0), (2, 200.0), (3, 300.0)):
+        db.add(SalaryModel(id=salary_id, company_id=1, user_id=OWNER.id, position="Engineer", salary_amount=amount))
+    await db.commit()
+    # Derived rows as the rebuild commands write them
+    await SalaryAggregateService(db).rebuild()
+    await CompanySummaryService(db).rebuild()
+    # The search index is set up once per database; do it here so it is not counted below
+    await ReviewService(db)._ensure_fts()
+    return db
+
+
+async def fetch(db, model, **criteria):
+    query = select(model).filter_by(**criteria).execution_options(populate_existing=True)
+    return (await db.execute(query)).scalar_one()
+
+
+async def test_review_text_update(seeded, statements):
+    review = await ReviewService(seeded).update_review(1, ReviewUpdate(title="Better"), OWNER)
+    assert review.title == "Better"
+    assert shapes(statements) == ["UPDATE reviews", *FTS_REINDEX]
+
+
+async def test_review_rating_update(seeded, statements):
+    review = await ReviewService(seeded).update_review(1, ReviewUpdate(rating=2), OWNER)
+    assert review.rating == 2
+    # update_returning_previous: SQLite cannot RETURNING from a joined table, so it reads
+    # the old rating first. PostgreSQL does both in one UPDATE ... FROM ... RETURNING,
+    # see test_postgresql_reads_previous_values_in_the_update.
+    assert shapes(statements) == [
+        "SELECT reviews",
+        "UPDATE reviews",
+        "UPDATE companies",
+        "INSERT company_summaries",
+        *FTS_REINDEX,
+        *LEADERBOARD_SYNC,
+    ]
+    company = await fetch(seeded, CompanyModel, id=1)
+    assert (company.review_count, company.rating_sum, company.rating) == (1, 2.0, 2.0)
+    summary = await fetch(seeded, CompanySummaryModel, company_id=1)
+    assert (summary.rating_2, summary.rating_4) == (1, 0)
+
+
+async def test_review_delete(seeded, statements):
+    assert await ReviewService(seeded).delete_review(1, OWNER) is True
+    assert shapes(statements) == [
+        "DELETE reviews",
+        "UPDATE companies",
+        "INSERT company_summaries",
+        "DELETE reviews_fts",
+        *LEADERBOARD_SYNC,
+    ]
+    company = await fetch(seeded, CompanyModel, id=1)
+    assert (company.review_count, company.rating) == (0, 0.0)
+    summary = await fetch(seeded, CompanySummaryModel, company_id=1)
+    assert summary.rating_4 == 0
+
+
+async def test_review_mutations_by_stranger_are_not_found(seeded):
+    service = ReviewService(seeded)
+    with pytest.raises(HTTPException) as raised:
+        await service.update_review(1, ReviewUpdate(title="Mine now"), STRANGER)
+    assert raised.value.status_code == 404
+    assert await service.delete_review(1, STRANGER) is False
+    assert (await service.get_review(1)).title == "Fine"
+
+
+async def test_review_update_by_admin(seeded):
+    review = await ReviewService(seeded).update_review(1, ReviewUpdate(content="Edited"), ADMIN)
+    assert review.content == "Edited"
+
+
+async def test_salary_text_update_is_one_statement(seeded, statements):
+    salary = await SalaryService(seeded).update_salary(2, SalaryUpdate(location="Berlin"), OWNER)
+    assert salary.location == "Berlin"
+    assert shapes(statements) == ["UPDATE salaries"]
+
+
+async def test_salary_position_and_amount_update(seeded, statements):
+    salary = await SalaryService(seeded).update_salary(2, SalaryUpdate(position="Sr. Engineer", salary_amount=250), OWNER)
+    assert (salary.position_normalized, salary.salary_amount) == ("senior engineer", 250)
+    # As for ratings: SQLite pre-reads the old position/amount, PostgreSQL does not
+    lock_rollup_row = ["INSERT salary_aggregates", "SELECT salary_aggregates"]
+    assert shapes(statements) == [
+        "SELECT salaries",
+        "UPDATE salaries",
+        *lock_rollup_row, "UPDATE salary_aggregates",  # out of "engineer"
+        *lock_rollup_row, "UPDATE salary_aggregates",  # into "senior engineer"
+        "INSERT company_summaries", "SELECT company_summaries", "SELECT salary_aggregates", "UPDATE company_summaries",
+        *LEADERBOARD_SYNC,
+    ]
+    old_key = await fetch(seeded, SalaryAggregateModel, company_id=1, position_key="engineer")
+    assert (old_key.count, old_key.salary_sum, old_key.min_amount, old_key.max_amount) == (2, 400.0, 100.0, 300.0)
+    new_key = await fetch(seeded, SalaryAggregateModel, company_id=1, position_key="senior engineer")
+    assert (new_key.count, new_key.salary_sum) == (1, 250.0)
+    summary = await fetch(seeded, CompanySummaryModel, company_id=1)
+    assert summary.salary_count == 3
+    assert summary.salary_median == pytest.approx(250, rel=0.02)
+    assert [(top["position"], top["count"]) for top in summary.top_positions] == [("engineer", 2), ("senior engineer", 1)]
+
+
+async def test_salary_delete(seeded, statements):
+    # The middle amount, so the rollup does not have to rescan salaries for min/max
+    assert await SalaryService(seeded).delete_salary(2, OWNER) is True
+    assert shapes(statements) == [
+        "DELETE salaries",
+        "INSERT salary_aggregates", "SELECT salary_aggregates", "UPDATE salary_aggregates",
+        "INSERT company_summaries", "SELECT company_summaries", "SELECT salary_aggregates", "UPDATE company_summaries",
+        *LEADERBOARD_SYNC,
+    ]
+    rollup = await fetch(seeded, SalaryAggregateModel, company_id=1, position_key="engineer")
+    assert (rollup.count, rollup.salary_sum) == (2, 400.0)
+    assert (await fetch(seeded, CompanySummaryModel, company_id=1)).salary_count == 2
+
+
+async def test_salary_mutations_by_stranger_are_not_found(seeded):
+    service = SalaryService(seeded)
+    with pytest.raises(HTTPException) as raised:
+        await service.update_salary(2, SalaryUpdate(location="Elsewhere"), STRANGER)
+    assert raised.value.status_code == 404
+    assert await service.delete_salary(2, STRANGER) is False
+    assert (await service.get_salary(2)).location is None
+
+
+async def test_missing_salary_is_not_found(seeded):
+    with pytest.raises(HTTPException) as raised:
+        await SalaryService(seeded).update_salary(99, SalaryUpdate(location="Nowhere"), ADMIN)
+    assert raised.value.status_code == 404
+
+
+async def test_postgresql_reads_previous_values_in_the_update():
+    issued = []
+
+    class Result:
+        def first(self):
+            return None
+
+    class PostgresSession:
+        bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+        async def execute(self, statement):
+            issued.append(str(statement.compile(dialect=postgresql.dialect())))
+            return Result()
+
+    await update_returning_previous(PostgresSession(), ReviewModel, 1, (ReviewModel.user_id == 1,), {"rating": 2}, ["rating"])
+    assert len(issued) == 1
+    sql = " ".join(issued[0].split())
+    assert sql.startswith("UPDATE reviews SET rating=")
+    assert "FROM (SELECT reviews_1.id AS id, reviews_1.rating AS rating FROM reviews AS reviews_1" in sql
+    assert "FOR UPDATE) AS previous" in sql
+    assert "RETURNING" in sql and "previous.rating" in sql